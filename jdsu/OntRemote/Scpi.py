@@ -20,13 +20,22 @@ $Date: 2019-05-13 13:13:52 +0200 (Mo, 13 Mai 2019) $
 
 """
 
-import calendar
-import time
-
 from ._error import OntRemoteError
 from .util import OntEventDecoder as _OntEventDecoder
 from .util import OntEventDecoderError as _OntEventDecoderError
 
+def _blockRootName(scpiName, marker):
+    """Return the SCPI name without the block marker node (e.g. ':bloc') and without a trailing '?'.
+    """
+
+    tmpName = scpiName.lower()
+    tmpName = tmpName.rstrip('?')
+    endPos = tmpName.rfind(marker)
+    if endPos > 0:
+        return scpiName[:endPos]
+    return scpiName[:len(tmpName)]
+
+
 class Parameter:
     """This class represents a scalar ONT parameter.
 
@@ -46,10 +55,14 @@ class Parameter:
         self._type = None
         self._storedValue = None
         self._formatString = ' %s'
+        self._opcQuery = bool(opcQuery)
+        self._rxCmd = self._con.receiveScpi
         self._txCmd = self._con.sendScpi
         if opcQuery:
             self._formatString += ';*OPC?'
             self._txCmd = self._con.receiveScpi
+        self._queryCmd = self._name + '?'
+        self._setTemplate = self._name + self._formatString
 
     def set(self, value):
         """The value type depends on the SCPI parameter registered with the object.
@@ -57,11 +70,9 @@ class Parameter:
         As a short cut it is also possible to assign a value by calling the object directly (e.g. myParameter('ON')).
         """
 
-        if self._type is None:
-            tmp = self._configureType()
-            self.set(value)
-            return
-        assert 0, "Parameter.set(): inconsistent internal state."
+        # type discovery once - replaces set() by the type specific function
+        self._configureType()
+        self.set(value)
 
     def get(self):
         """Return the current value of the parameter.
@@ -69,14 +80,8 @@ class Parameter:
         The return type depends on the SCPI parameter registered with the object.
         """
 
-        if self._type is None:
-            value = self._configureType()
-            if isinstance(value, str):
-                if value[0] == '"':
-                    value = value[1:-1]
-                    value = value.replace('""', '"')
-            return value
-        assert 0, "Parameter.get(): inconsistent internal state."
+        # type discovery once - replaces get() by the type specific function
+        return self._parseValue(self._rxCmd(self._queryCmd))
 
     def range(self):
         """Return a tuple with (min, max) values of the registered SCPI parameter.
@@ -87,9 +92,7 @@ class Parameter:
         cmd = self._name + '?'
         result = self._con.receiveScpi(cmd + ' min;' + cmd + ' max')
         result = result.split(';')
-        if result[0].find('.') > -1:
-            return float(result[0]), float(result[1])
-        return int(result[0]), int(result[1])
+        return _parseNumericValue(result[0]), _parseNumericValue(result[1])
 
     def store(self):
         """Store the current setting internally.
@@ -105,6 +108,20 @@ class Parameter:
             raise OntRemoteError('Parameter.restore(): the member function store() must have been called before.')
         self.set(self._storedValue)
 
+    def _storeResponse(self, response):
+        """Store the value of a response to the query _queryCmd (used by ParameterGroup).
+        """
+
+        self._storedValue = self._parseValue(response)
+
+    def _restoreCmd(self):
+        """Return the SCPI command restoring the stored setting or None if the type is not yet known.
+        """
+
+        if self._type is None:
+            return None
+        return self._setCmd(self._storedValue)
+
     def type(self):
         """Return the Python type of the registered parameter.
 
@@ -129,19 +146,26 @@ class Parameter:
         return result
 
     def _configureType(self):
-        cmd = self._name + '?'
-        value = self._con.receiveScpi(cmd)
+        value = self._rxCmd(self._queryCmd)
+        return self._applyType(value)
+
+    def _applyType(self, value):
+        """Select the type specific functions based on a raw SCPI response and return the converted value.
+        """
+
         self.set = self._set
-        try:
-            if value.find('.') > -1:
-                value = float(value)
-            else:
-                value = int(value)
+        self._setCmd = self._setCmdDefault
+        numericValue = _toNumeric(value)
+        if numericValue is not None:
+            value = numericValue
             self.get = self._getNumeric
-        except ValueError:
-            if value[0] == '"':
+            self._parseValue = _parseNumericValue
+        else:
+            if value.startswith('"'):
                 self.set = self._setScpiString
+                self._setCmd = self._setCmdScpiString
             self.get = self._getString
+            self._parseValue = self._parseString
 
         self._type = type(value)
         return value
@@ -153,18 +177,28 @@ class Parameter:
         The required duplication of enclosed quotation marks is also taken care of.
         """
 
+        self._txCmd(self._setCmdScpiString(value))
+
+    def _set(self, value):
+        """Set the value of a parameter of SCPI type 'Integer', 'Numeric' or 'Discrete'.
+        """
+
+        self._txCmd(self._setCmdDefault(value))
+
+    def _setCmdScpiString(self, value):
+        """Return the SCPI command setting a value of SCPI type 'String'.
+        """
+
         prefix = '"'
         postfix = '"'
         value = value.replace('"', '""')
-        cmd = self._name + self._formatString % ( prefix + value + postfix, )
-        self._txCmd(cmd)
+        return self._setTemplate % ( prefix + value + postfix, )
 
-    def _set(self, value):
-        """Set the value of a parameter of SCPI type 'Integer', 'Numeric' or 'Discrete'.
+    def _setCmdDefault(self, value):
+        """Return the SCPI command setting a value of SCPI type 'Integer', 'Numeric' or 'Discrete'.
         """
 
-        cmd = self._name + self._formatString % (value, )
-        self._txCmd(cmd)
+        return self._setTemplate % (value, )
 
     def _getString(self):
         """Return the current value of the parameter as a Python 'str'.
@@ -173,12 +207,8 @@ class Parameter:
         The enclosing quotation marks of an SCPI 'String' are removed.
         """
 
-        cmd = self._name + '?'
-        value = self._con.receiveScpi(cmd)
-        if value[0] == '"':
-            value = value[1:-1]
-            value = value.replace('""', '"')
-        return value
+        value = self._rxCmd(self._queryCmd)
+        return self._parseString(value)
 
     def _getNumeric(self):
         """Return the current value of the parameter as a Python 'int' or 'float'.
@@ -186,12 +216,27 @@ class Parameter:
         This is the SCPI 'Integer' and 'Numeric' specific get() function.
         """
 
-        cmd = self._name + '?'
-        value = self._con.receiveScpi(cmd)
-        if value.find('.') > -1:
-            value = float(value)
-        else:
-            value = int(value)
+        value = self._rxCmd(self._queryCmd)
+        return _parseNumericValue(value)
+
+    def _parseValue(self, value):
+        """Type configuration once - replaced by the type specific parse function.
+        """
+
+        value = self._applyType(value)
+        if isinstance(value, str):
+            value = self._parseString(value)
+        return value
+
+    def _parseString(self, value):
+        """Remove the enclosing quotation marks of an SCPI 'String'.
+        """
+
+        if value.startswith('"'):
+            value = value[1:-1]
+            # embedded quotation marks are rare - skip the replace scan in the common case
+            if '""' in value:
+                value = value.replace('""', '"')
         return value
 
     def __call__(self, value):
@@ -225,32 +270,30 @@ class BlockParameter:
         opcQuery:   When enabled the setting of values is followed by a *OPC? query.
         """
 
-        tmpName = scpiName.lower()
-        tmpName = tmpName.rstrip('?')
-        endPos = tmpName.rfind(':bloc')
-        if endPos > 0:
-            self._name = scpiName[:endPos]
-        else:
-            self._name = scpiName[:len(tmpName)]
+        self._name = _blockRootName(scpiName, ':bloc')
         self._con = ontRemote
         self._type = None
         self._storedValue = None
         self._postfixString = ''
+        self._opcQuery = bool(opcQuery)
+        self._rxCmd = self._con.receiveScpi
         self._txCmd = self._con.sendScpi
         if opcQuery:
             self._postfixString = ';*OPC?'
             self._txCmd = self._con.receiveScpi
+        self._queryCmd = self._name + ':BLOC?'
+        self._rangeQueryTemplate = self._name + '? %d,%d'
 
     def set(self, index, values):
         """index:  Start setting the values at index. The index is zero based.
         values: A list or tuple of values to be set.
         """
 
-        if isinstance(values, str) or isinstance(values, float) or isinstance(values, int):
-            # convert a single value into a list of values
-            values = list( (values,))
-        cmd = self._name + '? %d,%d' % (index, len(values))
-        response = self._con.receiveScpi(cmd)
+        count = 1
+        if not isinstance(values, (str, float, int)):
+            count = len(values)
+        cmd = self._rangeQueryTemplate % (index, count)
+        response = self._rxCmd(cmd)
         response = response.split(',')
         self._configureType(response[0])
         self.set(index, values)
@@ -261,17 +304,17 @@ class BlockParameter:
         """
 
         if length == None:
-            cmd = self._name + ':BLOC?'
+            cmd = self._queryCmd
         else:
-            cmd = self._name + '? %d,%d' % (index, length)
-        response = self._con.receiveScpi(cmd)
+            cmd = self._rangeQueryTemplate % (index, length)
+        response = self._rxCmd(cmd)
         response = response.split(',')
         if (length == None) and index > 0:
             response = response[index:]
             if not response:
                 ## force an ONT exception because index >= size
-                cmd = self._name + '? %d,%d' % (index, 1)
-                response = self._con.receiveScpi(cmd)
+                cmd = self._rangeQueryTemplate % (index, 1)
+                response = self._rxCmd(cmd)
         response = self._parseValues(response)
         return response
 
@@ -289,6 +332,20 @@ class BlockParameter:
             raise OntRemoteError('BlockParameter.restore(): the member function store() must have been called before.')
         self.set(0, self._storedValue)
 
+    def _storeResponse(self, response):
+        """Store the values of a response to the query _queryCmd (used by ParameterGroup).
+        """
+
+        self._storedValue = self._parseValues(response.split(','))
+
+    def _restoreCmd(self):
+        """Return the SCPI command restoring the stored settings or None if the type is not yet known.
+        """
+
+        if self._type is None:
+            return None
+        return self._setCmd(0, self._storedValue)
+
     def type(self):
         """Return the Python type of the registered block parameter's values.
 
@@ -314,18 +371,17 @@ class BlockParameter:
 
     def _configureType(self, item):
         self.set = self._set
-        try:
-            if item.find('.') > -1:
-                item = float(item)
-            else:
-                item = int(item)
+        self._setCmd = self._setCmdDefault
+        numericItem = _toNumeric(item)
+        if numericItem is not None:
+            item = numericItem
             self._parseValues = self._parseNumericValues
-        except ValueError:
-            if item[0] == '"':
-                self.set = self._setScpiString
-                self._parseValues = self._parseStringValues
-            else:
-                self._parseValues = self._parseDiscreteValues
+        elif item.startswith('"'):
+            self.set = self._setScpiString
+            self._setCmd = self._setCmdScpiString
+            self._parseValues = self._parseStringValues
+        else:
+            self._parseValues = self._parseDiscreteValues
         self._type = type(item)
 
     def _setScpiString(self, index, values):
@@ -337,18 +393,7 @@ class BlockParameter:
         The quotation marks required for SCPI strings are automatically added by this function.
         """
 
-        if isinstance(values, str):
-            # convert a single string into a list of strings
-            values = list( (values,))
-        cmd = self._name + ' %d,%d' % (index, len(values))
-        for item in values:
-            prefix = ''
-            if item[0] != '"': prefix = '"'
-            postfix = ''
-            if item[-1] != '"': postfix = '"'
-            cmd += ',%s' % (prefix + item + postfix, )
-        cmd += self._postfixString
-        self._txCmd(cmd)
+        self._txCmd(self._setCmdScpiString(index, values))
 
     def _set(self, index, values):
         """index:  Start setting the values at index. The index is zero based.
@@ -357,23 +402,43 @@ class BlockParameter:
         Set the values of a block parameter of SCPI type 'Integer', 'Numeric' or 'Discrete'.
         """
 
-        if isinstance(values, str) or isinstance(values, float) or isinstance(values, int):
-            # convert a single value into a list of values
-            values = list( (values,))
-        cmd = self._name + ' %d,%d' % (index, len(values))
-        for item in values:
-            cmd += ',%s' % (item, )
-        cmd += self._postfixString
-        self._txCmd(cmd)
+        self._txCmd(self._setCmdDefault(index, values))
+
+    def _setCmdScpiString(self, index, values):
+        """Return the SCPI command setting values of SCPI type 'String'.
+        """
+
+        if isinstance(values, str):
+            # a single string - no list packing required
+            return '%s %d,1,%s%s' % (self._name, index, self._quoted(values), self._postfixString)
+        items = [self._quoted(item) for item in values]
+        return '%s %d,%d,%s%s' % (self._name, index, len(values), ','.join(items), self._postfixString)
+
+    def _quoted(self, item):
+        """Add the quotation marks required for an SCPI string if not yet present.
+        """
+
+        prefix = ''
+        if not item.startswith('"'): prefix = '"'
+        postfix = ''
+        if not item.endswith('"'): postfix = '"'
+        return prefix + item + postfix
+
+    def _setCmdDefault(self, index, values):
+        """Return the SCPI command setting values of SCPI type 'Integer', 'Numeric' or 'Discrete'.
+        """
+
+        if isinstance(values, (str, float, int)):
+            # a single value - no list packing required
+            return '%s %d,1,%s%s' % (self._name, index, values, self._postfixString)
+        return '%s %d,%d,%s%s' % (self._name, index, len(values), ','.join(map(str, values)), self._postfixString)
 
     def _parseValues(self, valueList):
-        """SCPI 'Discrete' needs no transformation
+        """Type configuration once - replaced by the type specific parse function.
         """
 
-        item = valueList[0]
         self._configureType(valueList[0])
-        valueList = self._parseValues(valueList)
-        return valueList
+        return self._parseValues(valueList)
 
     def _parseDiscreteValues(self, valueList):
         """SCPI 'Discrete' needs no transformation."""
@@ -393,11 +458,7 @@ class BlockParameter:
         """SCPI 'Numeric' or 'Integer': convert to native Python types.
         """
 
-        if valueList[0].find('.') > -1:
-            valueList = list(map(float, valueList)) # list: required for compatibility Python 2/3
-        else:
-            valueList = list(map(int, valueList))
-        return valueList
+        return _parseNumericList(valueList)
 
     def __call__(self, index, value):
         """Set the block parameter's values.
@@ -461,25 +522,129 @@ class ParameterGroup:
 
     def store(self):
         """Store the current settings internally.
+
+        The settings of all parameters are read by a single SCPI query.
         """
 
-        for param in self._parameterList:
-            param.store()
+        if not self._parameterList:
+            return
+        cmd = ';'.join([param._queryCmd for param in self._parameterList])
+        responses = self._con.receiveScpi(cmd).split(';')
+        if len(responses) == len(self._parameterList):
+            for param, response in zip(self._parameterList, responses):
+                param._storeResponse(response)
+        else:
+            ## a string value includes ';' - the response cannot be split reliably
+            for param in self._parameterList:
+                param.store()
 
     def restore(self):
         """Restore the previously stored settings.
 
         The settings are restored in the order the parameters were registered.
+        All parameters of known type are restored by a single SCPI command line.
         """
 
         for param in self._parameterList:
-            param.restore()
+            if param._storedValue is None:
+                raise OntRemoteError('ParameterGroup %s: restore(): the member function store() must have been called before.' % (self.description, ))
+        cmdList = []
+        opcQuery = False
+        for param in self._parameterList:
+            cmd = param._restoreCmd()
+            if cmd is not None:
+                cmdList.append(cmd)
+                opcQuery = opcQuery or param._opcQuery
+            else:
+                self._sendCommands(cmdList, opcQuery)
+                cmdList = []
+                opcQuery = False
+                param.restore()
+        self._sendCommands(cmdList, opcQuery)
+
+    def _sendCommands(self, cmdList, opcQuery):
+        """Send the commands as a single SCPI command line.
+
+        opcQuery: True if at least one parameter was registered with opcQuery - a response is expected.
+        Note: The command text cannot tell, a string value may include a '?'.
+        """
+
+        if not cmdList:
+            return
+        cmd = ';'.join(cmdList)
+        if opcQuery:
+            self._con.receiveScpi(cmd)
+        else:
+            self._con.sendScpi(cmd)
 
     def _isBlockParameter(self, name):
-        name = name.rstrip('?')
-        name = name.lower()
-        pos = name.rfind(':bloc')
-        return (pos > 0) and ((len(name) - pos) == 5)
+        name = name.rstrip('?').lower()
+        return name.endswith(':bloc') and (len(name) > 5)
+
+
+# SCPI numeric values start with a digit, a sign or a decimal point
+_numericStartChars = frozenset('0123456789+-.')
+
+def _toNumeric(value):
+    """Convert an SCPI 'Integer' or 'Numeric' string to a Python 'int' or 'float'.
+
+    Returns None for other values. Values starting with a letter or a quotation mark are rejected
+    without a conversion attempt; mnemonics may start with a digit or sign too (e.g. '10GE', '-INF'),
+    thus the conversion decides for all other values. Like integers, values without a decimal point
+    must convert by int(): e.g. '1E3' is no numeric value.
+    """
+
+    ## int()/float() accept leading whitespace - so does the pre-check
+    if value.lstrip()[:1] not in _numericStartChars:
+        return None
+    try:
+        return _parseNumericValue(value)
+    except ValueError:
+        return None
+
+
+def _parseNumericValue(value):
+    """Convert an SCPI 'Integer' or 'Numeric' string to a Python 'int' or 'float'.
+
+    Raises a ValueError for non-numeric values.
+    """
+
+    if '.' in value:
+        return float(value)
+    return int(value)
+
+
+def _parseNumericList(valueList):
+    """Convert a list of SCPI 'Integer' or 'Numeric' strings to native Python types.
+
+    Each item keeps its own type, as converted by _parseNumericValue(). If all items share the type
+    (no item or every item with a decimal point), the conversion runs in C (map).
+    Raises a ValueError for non-numeric items.
+    Note: A list is returned on purpose - the public get()/final() functions are documented to
+    return lists and their results are mutated and compared as such by user scripts.
+    """
+
+    pointCount = ''.join(valueList).count('.')
+    if pointCount == 0:
+        return list(map(int, valueList)) # list: required for compatibility Python 2/3
+    if pointCount == len(valueList):
+        ## one point per item - an item with several points raises a ValueError anyway
+        return list(map(float, valueList))
+    return [float(value) if '.' in value else int(value) for value in valueList]
+
+
+def _toNumericList(valueList):
+    """Convert a list of SCPI 'Integer' or 'Numeric' strings to native Python types.
+
+    Returns None if not all items are numeric - see _toNumeric().
+    """
+
+    if valueList[0].lstrip()[:1] not in _numericStartChars:
+        return None
+    try:
+        return _parseNumericList(valueList)
+    except ValueError:
+        return None
 
 
 def _decodeResult(result, scpiName):
@@ -492,16 +657,13 @@ def _decodeResult(result, scpiName):
         valid = False
         raise OntRemoteError('ScpiResult %s: Problem decoding valid flag' % scpiName)
     if valid:
-        try:
-            value = result[1]
-            if value.find('.') > -1:
-                value = float(value)
-            else:
-                value = int(value)
-        except ValueError:
-            if value[0] == '"':
-                # remove quotation marks of SCPI string result
-                value = value[1:-1]
+        value = result[1]
+        numericValue = _toNumeric(value)
+        if numericValue is not None:
+            value = numericValue
+        elif value.startswith('"'):
+            # remove quotation marks of SCPI string result
+            value = value[1:-1]
     else:
         value = None
     return valid, value
@@ -563,13 +725,7 @@ class BlockResult:
         scpiName: SCPI command name.
         """
 
-        tmpName = scpiName.lower()
-        tmpName = tmpName.rstrip('?')
-        endPos = tmpName.rfind(':bloc')
-        if endPos > 0:
-            self.name = scpiName[:endPos]
-        else:
-            self.name = scpiName[:len(tmpName)]
+        self.name = _blockRootName(scpiName, ':bloc')
         self._con = ontRemote
 
     def get(self, index = 0, length = None):
@@ -593,7 +749,7 @@ class BlockResult:
                     ## force an ONT exception because index >= LENG
                     cmd = self.name + '? %d,%d' % (index, 1)
                     values = self._con.receiveScpi(cmd)
-            return values
+            return self._parseValues(values)
         return None
 
     def length(self):
@@ -621,51 +777,56 @@ class BlockResult:
         valid, values = self._readValues(cmd)
         if valid:
             usedLength = len(values)
-            if index > 0:
+            if length is None:
                 values = values[index:]
-            if length is not None:
-                if length < len(values):
-                    values = values[:length]
+            else:
+                values = values[index:index + length]
             if not values:
                 ## Current results raise an exception if :LENG > 0 and index > LENG.
                 ## Final results have no corresponding API - thus exception must be raised locally
-                raise OntRemoteError('BlockResult %s: Index out of boundary - used length is %d' % cmd, usedLength)
-            return values
+                raise OntRemoteError('BlockResult %s: Index out of boundary - used length is %d' % (cmd, usedLength))
+            return self._parseValues(values)
         return None
 
     def _readValues(self, cmd):
-        values = self._con.receiveScpi(cmd)
-        values = values.split(',')
+        response = self._con.receiveScpi(cmd)
+        # split off the header without copying the value list
+        header, sep, values = response.partition(',')
         valid = False
         try:
-            resultCount = int(values[0])
+            resultCount = int(header)
             valid = (resultCount > -1)
         except ValueError:
             valid = False
             raise OntRemoteError('BlockResult %s: Problem decoding valid flag' % cmd)
         if valid:
-            values = values[1:]
+            values = values.split(',') if sep else []
             if resultCount != len(values):
-                raise OntRemoteError('BlockResult %s: Inconsistent result reported: length: %s / No of items: %s' % cmd, resultCount, len(values))
-            # be prepared for a list of length zero
-            if values:
-                try:
-                    if values[0].find('.') > -1:
-                        values = list(map(float, values)) # list: required for compatibility Python 2/3
-                    else:
-                        values = list(map(int, values))
-                except ValueError:
-                    # Check for SCPI string delimiters and remove them
-                    if values[0][0] == '"':
-                        resultList = []
-                        for item in values:
-                            item = item[1:-1]
-                            resultList.append(item)
-                        values = resultList
+                raise OntRemoteError('BlockResult %s: Inconsistent result reported: length: %s / No of items: %s' % (cmd, resultCount, len(values)))
         else:
             values = []
         return (valid, values)
 
+    def _parseValues(self, values):
+        """Convert the values reported by _readValues() to native Python types.
+
+        Applied after slicing, so only the requested values are converted.
+        """
+
+        # be prepared for a list of length zero
+        if values:
+            numericValues = _toNumericList(values)
+            if numericValues is not None:
+                values = numericValues
+            elif values[0].startswith('"'):
+                # Check for SCPI string delimiters and remove them
+                resultList = []
+                for item in values:
+                    item = item[1:-1]
+                    resultList.append(item)
+                values = resultList
+        return values
+
 
 class ExtendedBlockResult:
     """This class represents an ONT extended block result.
@@ -679,13 +840,7 @@ class ExtendedBlockResult:
         scpiName: SCPI command name.
         """
 
-        tmpName = scpiName.lower()
-        tmpName = tmpName.rstrip('?')
-        endPos = tmpName.rfind(':ebloc')
-        if endPos > 0:
-            self.name = scpiName[:endPos]
-        else:
-            self.name = scpiName[:len(tmpName)]
+        self.name = _blockRootName(scpiName, ':ebloc')
         self._con = ontRemote
 
     def get(self, index = 0, length = None):
@@ -707,12 +862,13 @@ class ExtendedBlockResult:
         valid, values = self._readValues(cmd)
         if valid:
             if (length is None) and (index > 0):
-                values = values[index:]
+                # values is a sequence of (flag, value) pairs
+                values = values[2 * index:]
                 if not values:
                     ## force an ONT exception because index >= LENG
                     cmd = self.name + ':ERANG? %d,%d' % (index, 1)
                     values = self._con.receiveScpi(cmd)
-            return values
+            return self._parseValues(values)
         return None
 
     def length(self):
@@ -742,17 +898,17 @@ class ExtendedBlockResult:
         cmd = ':SENS:DATA:FIN? "%s"' % (self.name,)
         valid, values = self._readValues(cmd)
         if valid:
-            usedLength = len(values)
-            if index > 0:
-                values = values[index:]
-            if length is not None:
-                if length < len(values):
-                    values = values[:length]
+            # values is a sequence of (flag, value) pairs
+            usedLength = len(values) // 2
+            if length is None:
+                values = values[2 * index:]
+            else:
+                values = values[2 * index:2 * (index + length)]
             if not values:
                 ## Current results raise an exception if :LENG > 0 and index > LENG.
                 ## Final results have no corresponding API - thus exception must be raised locally
-                raise OntRemoteError('ExtendedBlockResult %s: Index out of boundary - used length is %d' % cmd, usedLength)
-            return values
+                raise OntRemoteError('ExtendedBlockResult %s: Index out of boundary - used length is %d' % (cmd, usedLength))
+            return self._parseValues(values)
         return None
 
     def _readValues(self, cmd):
@@ -765,35 +921,53 @@ class ExtendedBlockResult:
         except ValueError:
             valid = False
             raise OntRemoteError('ExtendedBlockResult %s: Problem decoding valid flag' % cmd)
-        resultValues = []
         if valid:
             values = values[1:]
             if resultCount != int(len(values) / 2):
                 raise OntRemoteError('ExtendedBlockResult %s: Inconsistent result reported: length: %s / No of items: %s' % (cmd, resultCount, int(len(values) / 2)))
-            # be prepared for a list of length zero
-            if values:
-                for ii in range(resultCount):
-                    flag = values[2*ii]
-                    value = values[2*ii + 1]
-                    try:
-                        flag = (int(flag) == 1)
-                    except ValueError:
-                        flag = False
-                        raise OntRemoteError('ExtendedBlockResult %s: Problem decoding valid flag at index %d' % self.name, ii)
-                    if flag:
-                        try:
-                            if value.find('.') > -1:
-                                value = float(value)
-                            else:
-                                value = int(value)
-                        except ValueError:
-                            if value[0] == '"':
-                                # remove quotation marks of SCPI string result
-                                value = value[1:-1]
-                    else:
-                        value = None
-                    resultValues.append(value)
-        return (valid, resultValues)
+        else:
+            values = []
+        return (valid, values)
+
+    def _parseValues(self, values):
+        """Convert the (flag, value) pairs reported by _readValues() to a list of native Python types.
+
+        Applied after slicing, so only the requested values are converted. Invalid values are set to None.
+        """
+
+        resultValues = []
+        # be prepared for a list of length zero
+        if values:
+            validFlags = []
+            for ii, flag in enumerate(values[0::2]):
+                try:
+                    validFlags.append(int(flag) == 1)
+                except ValueError:
+                    raise OntRemoteError('ExtendedBlockResult %s: Problem decoding valid flag at index %d' % (self.name, ii))
+            # all values of a result share the same type - convert the valid ones in a single step
+            validValues = [value for flag, value in zip(validFlags, values[1::2]) if flag]
+            if validValues:
+                numericValues = _toNumericList(validValues)
+                if numericValues is not None:
+                    validValues = numericValues
+                else:
+                    # convert value by value: numeric and non-numeric values may be mixed
+                    validValues = [self._parseValue(value) for value in validValues]
+            validValues = iter(validValues)
+            resultValues = [next(validValues) if flag else None for flag in validFlags]
+        return resultValues
+
+    def _parseValue(self, value):
+        """Convert a single valid value to a native Python type.
+        """
+
+        numericValue = _toNumeric(value)
+        if numericValue is not None:
+            return numericValue
+        if value.startswith('"'):
+            # remove quotation marks of SCPI string result
+            return value[1:-1]
+        return value
 
 
 class ResultGroup:
@@ -825,7 +999,9 @@ class ResultGroup:
                     If the name is not provided the SCPI node is used as the key.
         """
 
-        cmd = ''
+        cmdList = []
+        # the root is parsed once per call, the SCPI commands are composed once at registration
+        scpiComponents = self._scpiRootComponents(resultRoot)
         for item in results:
             if isinstance(item, str):
                 item = (item, item)
@@ -833,13 +1009,12 @@ class ResultGroup:
                 raise OntRemoteError('ResultGroup %s: Result name must be unique: %s' % (self.description, item[0]))
             else:
                 self._names.add(item[0])
-            item = (item[0], self._scpiCmd(resultRoot, item[1]))
-            cmd += item[1]
-            cmd += ';'
+            item = (item[0], self._scpiCmd(scpiComponents, item[1]))
+            cmdList.append(item[1])
             self.nameList.append(item)
         if self._cmd:
-            self._cmd += ';'
-        self._cmd += cmd[:-1]
+            cmdList.insert(0, self._cmd)
+        self._cmd = ';'.join(cmdList)
 
     def _addBlockResult(self, resultName, index=0, length=None):
         """Not yet implemented."""
@@ -861,31 +1036,25 @@ class ResultGroup:
             raise OntRemoteError('ResultGroup %s: No results registered' % (self.description))
         result = self._con.receiveScpi(self._cmd)
         result = result.split(';')
-        resDict = {}
-        index = 0
-        for resultName,scpiName in self.nameList:
-            res = _decodeResult(result[index], scpiName)
-            if res[0] == 1:
-                resDict[resultName] = res[1]
-            else:
-                resDict[resultName] = None
-            index += 1
-        return resDict
+        if len(result) != len(self.nameList):
+            raise OntRemoteError('ResultGroup %s: Unexpected number of results - expected: %d / received: %d' % (self.description, len(self.nameList), len(result)))
+        # _decodeResult() reports None for invalid results
+        return {resultName: _decodeResult(item, scpiName)[1] for (resultName, scpiName), item in zip(self.nameList, result)}
 
-    def _scpiCmd(self, rootName, scpiName):
+    def _scpiCmd(self, scpiComponents, scpiName):
         if scpiName[-1] == '?':
             scpiName = scpiName[:-1]
         if scpiName[-1] == ':':
             scpiName = scpiName[:-1]
         if scpiName[0] == ':':
             scpiName = scpiName[1:]
-        scpiComponents = self._scpiRootComponents(rootName)
         if len(scpiComponents) == 1:
             cmd = scpiComponents[0] + ':' + scpiName + '?'
         elif len(scpiComponents) == 2:
             cmd = scpiComponents[0] + ':' + scpiName + ':' + scpiComponents[1] + '?'
         # add some sanity checks here
-        cmd = cmd.replace('::', ':')
+        if '::' in cmd:
+            cmd = cmd.replace('::', ':')
         return cmd
 
     def _scpiRootComponents(self, rootName):
@@ -917,6 +1086,8 @@ class EventList:
         self.name = scpiName
         self._con = ontRemote
         self._maxNumberPerCmd = 100
+        ## SCPI commands built from 'name', see _updateCommands()
+        self._cmdName = None
         ## decoder handling
         self._decoder = None
         self._enableDecoding = enableDecoding
@@ -928,16 +1099,19 @@ class EventList:
         """Set read 'pointer' to the start position.
         """
 
-        self._con.sendScpi('%s:FIRS' % self.name)
+        self._updateCommands()
+        self._con.sendScpi(self._firstCmd)
 
     def entriesToRead(self):
         """Return the number of entries to be read.
         """
 
-        return int(self._con.receiveScpi('%s:NUMB?' % self.name))
+        self._updateCommands()
+        return int(self._con.receiveScpi(self._numbQuery))
 
     _nsecPerSec = 1000000000
     _nsecPerMsec = 1000000
+    _daysPerMonth = (0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
 
     def get(self, number, filter=None):
         """Return a list of events.
@@ -952,41 +1126,53 @@ class EventList:
         """
 
         result = []
-        availableNo = int(self._con.receiveScpi('%s:NUMB?' % self.name))
-        number = min(number, availableNo)
-        receivedEvents = 0
-        while number > 0:
-            perCallCount = min(number, self._maxNumberPerCmd)
-            scpiResponse = self._con.receiveScpi('%s? %d' % (self.name, perCallCount))
-            res = scpiResponse.split(',')
-            if (int(res[0]) != perCallCount):
-                raise OntRemoteError('EventList %s: Unexpected number of events - requested: %d / received: %d' % (self.name, perCallCount, int(res[0])))
-            if (len(res) != (1 + 25 * perCallCount)):
-                raise OntRemoteError('EventList %s: Unexpected event structure - items expected: %d / items received: %d' % (self.name, (1 + 25 * perCallCount), len(res)))
-
-            number -= perCallCount
-            receivedEvents += perCallCount
-            # convert string result -> Python dictionary
-            for ii in range(0, perCallCount*25, 25):
-                id = int(res[ii+1])
-                startValue = self._getTime(res[ii+2:ii+10])
-                stopValue = self._getTime(res[ii+10:ii+18])
-                durationValue = (  (int((((((int(res[ii+18]) * 24) + int(res[ii+19])) * 60) + int(res[ii+20])) * 60) + int(res[ii+21])) * EventList._nsecPerSec)
-                                 + (int(res[ii+22]) * EventList._nsecPerMsec) + int(res[ii+23]) )
-                eventType = int(res[ii+24])
-                value = int(res[ii+25])
-                event = { 'id': id, 'startTime' : startValue, 'stopTime' : stopValue, 'duration': durationValue, 'type': eventType, 'count' : value }
-                event = self._decode(event)
-                if filter is None:
-                    result.append(event)
-                else:
-                    if callable(filter):
-                        if filter(event):
-                            result.append(event)
-                    elif id == filter:
-                        result.append(event)
+        ## the filter kind is invariant: select it once, not per event
+        if filter is None:
+            filterMode = 0
+        elif callable(filter):
+            filterMode = 1
+        else:
+            filterMode = 2
+        ## note: self._decode is looked up per event because the first call replaces it
+        buildEvent = self._event
+        for fields in self._readFields(number):
+            startIndices = range(1, len(fields), 25)
+            if filterMode == 0:
+                result.extend([self._decode(buildEvent(fields, ii)) for ii in startIndices])
+            elif filterMode == 1:
+                events = (self._decode(buildEvent(fields, ii)) for ii in startIndices)
+                result.extend([event for event in events if filter(event)])
+            else:
+                ## event-ID filter: only events with a matching ID are built and decoded
+                result.extend([self._decode(buildEvent(fields, ii)) for ii in startIndices if fields[ii] == filter])
         return result
 
+    def getColumns(self, number, filter=None):
+        """Return the events column by column.
+
+        number: The number of requested events. The number of events returned may be lower.
+        filter: Optional single event-ID. Callable filters are supported by get() only.
+
+        The result is a dictionary with the keys 'id', 'startTime', 'stopTime', 'duration', 'type' and 'count'.
+        Each value is a list with one item per event - no per-event dictionaries are built.
+        Note: Event decoding (additional info) is only applied by get().
+        """
+
+        if callable(filter):
+            raise OntRemoteError('EventList %s: getColumns(): callable filters are not supported - use get()' % (self.name, ))
+        columns = dict((key, []) for key in ('id', 'startTime', 'stopTime', 'duration', 'type', 'count'))
+        for fields in self._readFields(number):
+            startIndices = range(1, len(fields), 25)
+            if filter is not None:
+                startIndices = [ii for ii in startIndices if fields[ii] == filter]
+            columns['id'].extend([fields[ii] for ii in startIndices])
+            columns['startTime'].extend([self._getTime(fields, ii+1) for ii in startIndices])
+            columns['stopTime'].extend([self._getTime(fields, ii+9) for ii in startIndices])
+            columns['duration'].extend([self._getDuration(fields, ii+17) for ii in startIndices])
+            columns['type'].extend([fields[ii+23] for ii in startIndices])
+            columns['count'].extend([fields[ii+24] for ii in startIndices])
+        return columns
+
     def next(self):
         """Return a dictionary with event item data.
 
@@ -994,28 +1180,15 @@ class EventList:
         """
 
         result = {}
-        count = int(self._con.receiveScpi('%s:NUMB?' % self.name))
+        self._updateCommands()
+        count = int(self._con.receiveScpi(self._numbQuery))
         if count > 0:
-            scpiResponse = self._con.receiveScpi('%s? 1' % self.name)
+            scpiResponse = self._con.receiveScpi(self._chunkQuery(1))
             res = scpiResponse.split(',')
             if (len(res) != 26) or (int(res[0]) != 1):
                 raise OntRemoteError('EventList %s: Unexpected event structure - data received: %s' % (self.name, res))
-            id = int(res[1])
-            startValue = self._getTime(res[2:10])
-            stopValue = self._getTime(res[10:18])
-            durationValue = ( (int((((((int(res[18]) * 24) + int(res[19])) * 60) + int(res[20])) * 60) + int(res[21])) * EventList._nsecPerSec)
-                            + (int(res[22]) * EventList._nsecPerMsec) + int(res[23]) )
-            eventType = int(res[24])
-            value = int(res[25])
-            ## debugging - begin
-            if False:
-                startTime = res[2] + '-' + res[3] + '-' + res[4] + ' ' + res[5] + ':' + res[6] + ':' + res[7] + '.' + res[8]
-                stopTime  = res[10] + '-' + res[11] + '-' + res[12] + ' ' + res[13] + ':' + res[14] + ':' + res[15] + '.' + res[16]
-                duration  = res[18] + 'd ' + res[19] + 'h ' + res[20] + 'm ' + res[21] + 's ' + res[22] + 'ms'
-                # print id, startTime, stopTime, duration, eventType, value
-            ## debugging - end
-            result = { 'id': id, 'startTime' : startValue, 'stopTime' : stopValue, 'duration': durationValue, 'type': eventType, 'count' : value }
-            result = self._decode(result)
+            fields = list(map(int, res))
+            result = self._decode(self._event(fields, 1))
         return result
 
     def skip(self, number):
@@ -1024,13 +1197,14 @@ class EventList:
 
         if number < 1:
             return number
-        noOfEntries = int(self._con.receiveScpi('%s:NUMB?' % self.name))
+        self._updateCommands()
+        noOfEntries = int(self._con.receiveScpi(self._numbQuery))
         number = min(number, noOfEntries)
         skipCount = 0
         while number > 0:
             perCallCount = min(number, self._maxNumberPerCmd)
             ## nobody cares for the result
-            self._con.receiveScpi('%s? %d' % (self.name, perCallCount))
+            self._con.receiveScpi(self._chunkQuery(perCallCount))
             number -= perCallCount
             skipCount += perCallCount
         return skipCount
@@ -1044,43 +1218,136 @@ class EventList:
         Note: The eventID is not reported as additional info.
         """
 
-        self._buildDecoder()
+        self._initDecoder()
         if self._decoder:
             fieldList = self._decoder.additionalInfo()
             mergedList = []
+            ## the set avoids a linear list search per item; the list keeps the order
+            mergedItems = set()
             for items in fieldList:
                 for item in items:
-                    if item not in mergedList: mergedList.append(item)
+                    if item not in mergedItems:
+                        mergedItems.add(item)
+                        mergedList.append(item)
             return mergedList
         return None
 
 
-    def _getTime(self, dateTime):
-        """Convert textual date and time representation into seconds since 01.01.1970
+    def _readFields(self, number):
+        """Read up to number events and yield the integer fields of each chunk.
 
-        Note: If the date is less (earlier) than 1970-01-01 a ValueError is raised and the function returns 'None'.
+        The first item of each chunk is the event count followed by 25 fields per event.
         """
 
-        timeString = dateTime[0] + '-' + dateTime[1] + '-' + dateTime[2] + ' ' + dateTime[3] + ':' + dateTime[4] + ':' + dateTime[5]
-        try:
-            timeStruct = time.strptime(timeString, '%Y-%m-%d %H:%M:%S')
-            timeValue = ( (calendar.timegm(timeStruct) * EventList._nsecPerSec)
-                        + (int(dateTime[6]) * EventList._nsecPerMsec) + int(dateTime[7]) )
-        except ValueError as e:
-            timeValue = None
+        if number <= 0:
+            return
+        ## the read requests are clamped to the number of available events: whether the unit
+        ## answers an over-long request with a short chunk is not specified - no fused probe
+        self._updateCommands()
+        number = min(number, int(self._con.receiveScpi(self._numbQuery)))
+        while number > 0:
+            perCallCount = min(number, self._maxNumberPerCmd)
+            res = self._con.receiveScpi(self._chunkQuery(perCallCount)).split(',')
+            receivedCount = int(res[0])
+            if (receivedCount != perCallCount):
+                raise OntRemoteError('EventList %s: Unexpected number of events - requested: %d / received: %d' % (self.name, perCallCount, receivedCount))
+            if (len(res) != (1 + 25 * perCallCount)):
+                raise OntRemoteError('EventList %s: Unexpected event structure - items expected: %d / items received: %d' % (self.name, (1 + 25 * perCallCount), len(res)))
+
+            number -= perCallCount
+            # all items are integers
+            fields = list(map(int, res)) # list: required for compatibility Python 2/3
+            ## release the string items before the chunk is handed out; the generator
+            ## frame would otherwise keep them alive while the caller builds the events
+            del res
+            yield fields
+
+    def _updateCommands(self):
+        """(Re)build the SCPI commands if 'name' was changed since the last call.
+        """
+
+        if self._cmdName is not self.name:
+            self._cmdName = self.name
+            self._firstCmd = '%s:FIRS' % self.name
+            self._numbQuery = '%s:NUMB?' % self.name
+            self._fullChunkQuery = '%s? %d' % (self.name, self._maxNumberPerCmd)
+
+    def _chunkQuery(self, count):
+        """Return the query reading count events; the full chunk query is prebuilt.
+        """
+
+        if count == self._maxNumberPerCmd:
+            return self._fullChunkQuery
+        return '%s? %d' % (self.name, count)
+
+    def _event(self, fields, ii):
+        """Return the event dictionary for the 25 integer fields starting at index ii.
+
+        Field layout: id, start time (8), stop time (8), duration (6: d, h, m, s, ms, ns), type, count
+        """
+
+        startValue = self._getTime(fields, ii+1)
+        stopValue = self._getTime(fields, ii+9)
+        durationValue = self._getDuration(fields, ii+17)
+        return { 'id': fields[ii], 'startTime' : startValue, 'stopTime' : stopValue, 'duration': durationValue, 'type': fields[ii+23], 'count' : fields[ii+24] }
+
+    def _getDuration(self, fields, ii):
+        """Convert the 6 integer duration fields starting at index ii into nanoseconds
+
+        Field layout: days, hours, minutes, seconds, msec, nsec
+        """
+
+        return ( (((((fields[ii] * 24) + fields[ii+1]) * 60) + fields[ii+2]) * 60 + fields[ii+3]) * EventList._nsecPerSec
+               + (fields[ii+4] * EventList._nsecPerMsec) + fields[ii+5] )
+
+    def _getTime(self, fields, ii):
+        """Convert the 8 integer date and time fields starting at index ii into nanoseconds since 01.01.1970
+
+        Field layout: year, month, day, hour, minute, second, msec, nsec
+        Note: If the date is invalid the function returns 'None'. Dates earlier than 1970-01-01 result in
+        negative values. Like the former strptime() based conversion, only 4 digit years are accepted.
+        """
+
+        year, month, day, hour, minute, second = fields[ii:ii+6]
+        if not (1000 <= year <= 9999) or not (1 <= month <= 12) or not (1 <= day <= EventList._daysPerMonth[month]):
+            return None
+        if (month == 2) and (day == 29) and not ((year % 4 == 0) and ((year % 100 != 0) or (year % 400 == 0))):
+            return None
+        if not ((0 <= hour <= 23) and (0 <= minute <= 59) and (0 <= second <= 61)):
+            return None
+        ## days since 1970-01-01 of the proleptic Gregorian calendar ('days_from_civil', March based year)
+        if month <= 2:
+            year -= 1
+            month += 9
+        else:
+            month -= 3
+        era = year // 400
+        yearOfEra = year - era * 400
+        dayOfEra = yearOfEra * 365 + yearOfEra // 4 - yearOfEra // 100 + (153 * month + 2) // 5 + day - 1
+        days = era * 146097 + dayOfEra - 719468
+        timeValue = ( ((((days * 24) + hour) * 60 + minute) * 60 + second) * EventList._nsecPerSec
+                    + (fields[ii+6] * EventList._nsecPerMsec) + fields[ii+7] )
         return timeValue
 
     def _decodeInit(self, event):
         """Decoder initialization once.
         """
 
-        self._buildDecoder()
-        if self._decoder:
-            self._decode = self._decodeEvent
-            return self._decodeEvent(event)
-        else:
-            self._decode = self._decodeEmpty
-            return self._decodeEmpty(event)
+        self._initDecoder()
+        return self._decode(event)
+
+    def _initDecoder(self):
+        """Build the decoder and select the decode function - once per event list.
+
+        The version check and the format queries of _buildDecoder() are not repeated afterwards.
+        """
+
+        if self._decode == self._decodeInit:
+            self._buildDecoder()
+            if self._decoder:
+                self._decode = self._decodeEvent
+            else:
+                self._decode = self._decodeEmpty
 
     def _decodeEvent(self, event):
         """JSON based decoder.
@@ -33,6 +33,7 @@ except:
 __all__ = ['OntRemote',
            'OntRemoteError',
            'Scpi',
+           'receiveScpiConcurrently',
             '__version__',
             '__build__'
            ]
@@ -40,4 +41,5 @@ __all__ = ['OntRemote',
 from ._core import OntRemote
 from ._error import OntRemoteError
 from . import Scpi
+from .util import receiveScpiConcurrently
 
@@ -30,6 +30,22 @@ class Application:
     def __init__(self, scpiConnection):
         self.timeout = 240
         self._con = scpiConnection
+        ## the module type is a HW property of the measurement port; queried once per connection
+        self._moduleType = None
+
+    def _resetCache(self):
+        """Forget values cached for the current connection.
+        """
+
+        self._moduleType = None
+
+    def _getModuleType(self):
+        """Return the (cached) module type of the measurement port.
+        """
+
+        if self._moduleType is None:
+            self._moduleType = self._con.receiveScpi(':INST:CONF:MOD:TYPE?')
+        return self._moduleType
 
     def loadNew(self):
         """Load the "New-Application".
@@ -78,7 +94,7 @@ class Application:
             if res == '""':
                 self.loadNew()
             self._con.sendScpi(':INST:CONF:EDIT:OPEN ON;*WAI')
-            moduleType = self._con.receiveScpi(':INST:CONF:MOD:TYPE?')
+            moduleType = self._getModuleType()
             if portConf is not None:
                 if moduleType == 'MODMTM':
                     portConfList = self._con.receiveScpi(':INST:CONF:EDIT:PORT:CONF:CAT?').split(',')
@@ -135,13 +151,11 @@ class Application:
         result['name'] = applName[1:-1]
         if not result['name']:
             return {}
-        # an application is loaded, query the other parameters
-        result['portConf'] = self._con.receiveScpi(':INST:CONF:PORT:CONF?')
-        result['devMode'] = self._con.receiveScpi(':INST:CONF:DEV:MODE?')
+        # an application is loaded, query the other parameters with a single compound query
+        res = self._con.receiveScpi(':INST:CONF:PORT:CONF?;:INST:CONF:DEV:MODE?;:INST:CONF:LAY:STAC?;:INST:CONF:JWAN:AVAIL?')
+        result['portConf'], result['devMode'], result['stack'], jitterAvail = res.split(';')
         if result['devMode'].upper() == 'THRU':
             result['thruMode'] = self._con.receiveScpi(':INST:CONF:THRU:MODE?')
-        result['stack'] = self._con.receiveScpi(':INST:CONF:LAY:STAC?')
-        jitterAvail = self._con.receiveScpi(':INST:CONF:JWAN:AVAIL?')
         if jitterAvail.upper() != 'OFF':
             result['jitterwander'] = self._con.receiveScpi(':INST:CONF:JWAN:MODE?')
         return result
@@ -214,15 +228,14 @@ class Application:
             editOpen = self._con.receiveScpi(':INST:CONF:EDIT:OPEN?')
             self._con.receiveScpi(':INST:CONF:EDIT:OPEN ON;*OPC?')
             ## store original settings
-            portConfRestore = self._con.receiveScpi(':INST:CONF:EDIT:PORT:CONF?')
-            devModeRestore = self._con.receiveScpi(':INST:CONF:EDIT:DEV:MODE?')
+            res = self._con.receiveScpi(':INST:CONF:EDIT:PORT:CONF?;:INST:CONF:EDIT:DEV:MODE?;:INST:CONF:JWAN:AVAIL?')
+            portConfRestore, devModeRestore, jitterAvail = res.split(';')
             if devModeRestore.upper() == 'THRU':
                 thruModeRestore = self._con.receiveScpi(':INST:CONF:THRU:MODE?')
-            jitterAvail = self._con.receiveScpi(':INST:CONF:JWAN:AVAIL?')
             if jitterAvail.upper() != 'OFF':
                 jitterwanderRestore = self._con.receiveScpi(':INST:CONF:JWAN:MODE?')
             if portConf is not None:
-                moduleType = self._con.receiveScpi(':INST:CONF:MOD:TYPE?')
+                moduleType = self._getModuleType()
                 if moduleType == 'MODMTM':
                     portConfList = self._con.receiveScpi(':INST:CONF:EDIT:PORT:CONF:CAT?').split(',')
                     if portConf in portConfList:
@@ -20,28 +20,76 @@ $Date: 2019-05-15 14:16:30 +0200 (Mi, 15 Mai 2019) $
 
 """
 
-import telnetlib
-from time import sleep
+import re
+import select
+import socket
+try:
+    from time import monotonic
+except ImportError:
+    ## Python 2: the wall clock is the best available substitute
+    from time import time as monotonic
 
 from ._error import OntRemoteError
 
 
+_opcPattern = re.compile(r'\*OPC\?', re.IGNORECASE)
+
+def _splitQuery(scpiQuery):
+    """
+    Split the query using *opc? with no respect to how it is written
+    and deliver the parts. Both upper and lower case and whitespace are preserved.
+    """
+    if not _opcPattern.search(scpiQuery):
+        # nothing to split
+        if scpiQuery:
+            return [scpiQuery]
+        return []
+    retval = []
+    nonOpcItems = ''
+    queryParts = scpiQuery.split(';')
+    for item in queryParts:
+        if _opcPattern.search(item):
+            if nonOpcItems:
+                retval.append(nonOpcItems)
+                nonOpcItems = ''
+            retval.append(item)
+        else:
+            if nonOpcItems:
+                nonOpcItems = ';'.join((nonOpcItems, item))
+            else:
+                nonOpcItems = item
+    if nonOpcItems:
+        retval.append(nonOpcItems)
+    return retval
+
+
 class _OntTcpConnection:
     """This class is intended for internal use only. It may be modified without prior notice.
 
     Maintains a connection to a remote unit over TCP/IP. The TCP port number selects the ONT measurement port.
+    The SCPI messages are exchanged over a plain socket - no telnet option negotiation is used by the ONT.
     """
     
     _eoc = '\n'
     _eoc_encoded = _eoc.encode('ascii')
     _cr  = '\r'
-    
+    _cr_encoded = _cr.encode('ascii')
+    _connectTimeout = 10
+    _recvSize = 65536
+    _sndBufSize = 65536
+    _rcvBufSize = 262144
+
     def __init__(self, ipAddr=None, tcpPort=None):
         self._isConnected = False
         self._ipAddr = ipAddr
         self._tcpPort = tcpPort
         self._errorCheck = False
-        self._ts = telnetlib.Telnet()
+        self._sock = None
+        self._promptOff = False
+        self._tcpNoDelay = True
+        self._rxBuffer = bytearray()
+        ## fixed size chunk reused by each recv_into() call
+        self._rxChunk = bytearray(self._recvSize)
 
     def connect(self, ipAddr=None, tcpPort=None):
         """Establish the connection.
@@ -52,7 +100,10 @@ class _OntTcpConnection:
         if tcpPort != None:
             self._tcpPort = tcpPort
         if not self._isConnected:
-            self._ts.open(self._ipAddr, self._tcpPort, 10)
+            self._sock = socket.create_connection((self._ipAddr, self._tcpPort), self._connectTimeout)
+            self._setSocketOptions()
+            self._promptOff = False
+            del self._rxBuffer[:]
             self._isConnected = True
 
     def disconnect(self):
@@ -61,12 +112,47 @@ class _OntTcpConnection:
 
         if self._isConnected:
             try:
-                self._ts.close()
+                self._sock.close()
             except:
                 raise
             finally:
+                self._sock = None
                 self._isConnected = False
 
+    def setTcpNoDelay(self, enable):
+        """Enable/disable TCP_NODELAY (enabled by default); applied immediately if connected.
+        """
+
+        self._tcpNoDelay = bool(enable)
+        if self._isConnected:
+            try:
+                self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, int(self._tcpNoDelay))
+            except socket.error:
+                pass
+
+    def promptOff(self):
+        """Send '*prompt off' once per connection (required for older SW versions).
+        """
+
+        if not self._promptOff:
+            self.sendScpi('*prompt off')
+            self._promptOff = True
+
+    def isPeerClosed(self):
+        """Return True if the remote unit has closed the connection (or it is broken).
+
+        Pending response data is not consumed.
+        """
+
+        if not self._isConnected:
+            return True
+        try:
+            if not select.select([self._sock], [], [], 0)[0]:
+                return False
+            return not self._sock.recv(1, socket.MSG_PEEK)
+        except (select.error, socket.error):
+            return True
+
     def sendScpi(self, scpiCmd):
         """Send an SCPI command to the remote unit (no response expected).
         """
@@ -74,7 +160,7 @@ class _OntTcpConnection:
         if not self._isConnected:
             raise OntRemoteError('No connection to ONT')
 
-        self._ts.write( scpiCmd.encode('ascii') + self._eoc_encoded)
+        self._sock.sendall( scpiCmd.encode('ascii') + self._eoc_encoded)
 
     def receiveScpi(self, scpiQuery, timeout=5):
         """Send an SCPI query to the remote unit and wait for the response string.
@@ -88,48 +174,79 @@ class _OntTcpConnection:
         # sends us in waiting for the timeout whenever an error occurs.
         # Due to this, we split the *OPC? from the command and send it as a separate command
         # message.
-        result = ''
-        queryParts = self._splitQuery(scpiQuery)
-        for queryPart in queryParts:
-            self._ts.write(queryPart.encode('ascii') + self._eoc_encoded)
+        return ';'.join(self.receiveScpiMessages(_splitQuery(scpiQuery), timeout))
+
+    def receiveScpiMessages(self, queryParts, timeout=5):
+        """Send a list of SCPI command messages and return the list of response strings.
+
+        The command messages are pipelined: all of them are written at once and the
+        responses are read afterwards in the same order. A response is expected for
+        each message containing a query.
+        """
 
-            if queryPart.find('?') >= 0: # It is a real query, read the result
-                queryPartResult = self._ts.read_until(self._eoc_encoded, timeout)
-                queryPartResult = queryPartResult.decode('ascii')
+        if not self._isConnected:
+            raise OntRemoteError('No connection to ONT')
+        results = []
+        self._sock.sendall((self._eoc.join(queryParts) + self._eoc).encode('ascii'))
+        for queryPart in queryParts:
+            if '?' in queryPart: # It is a real query, read the result
+                queryPartResult = self._readResponse(timeout)
 
-                if (not queryPartResult) or (queryPartResult[-1] != self._eoc):
+                if not queryPartResult.endswith(self._eoc_encoded):
                     raise OntRemoteError('Timeout while waiting for SCPI query response: %s (t:%.1fs)' % (queryPart, timeout))
                 # remove eoc and optional <CR> control characters
-                if queryPartResult and (queryPartResult[-1] == self._eoc):
-                    queryPartResult = queryPartResult[:-1]
-                if queryPartResult and (queryPartResult[-1] == self._cr):
-                    queryPartResult = queryPartResult[:-1]
-                if result:
-                    result += ';'
-                result += queryPartResult
+                end = len(queryPartResult) - 1
+                if queryPartResult.endswith(self._cr_encoded, 0, end):
+                    end -= 1
+                # the response is a private copy: truncate it in place - no intermediate copy of large responses
+                del queryPartResult[end:]
+                # str(): the native string type on Python 2 as well
+                results.append(str(queryPartResult.decode('ascii')))
+
+        return results
+
+    def _setSocketOptions(self):
+        """Tune the socket for short SCPI request/response messages.
+
+        TCP_NODELAY disables Nagle's algorithm which otherwise may delay short commands.
+        SO_KEEPALIVE detects broken connections of long idle sessions.
+        The options are hints only - an OS rejecting them does not prevent the connection.
+        """
 
-        return str(result)
+        options = ( (socket.IPPROTO_TCP, socket.TCP_NODELAY, int(self._tcpNoDelay)),
+                    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+                    (socket.SOL_SOCKET, socket.SO_SNDBUF, self._sndBufSize),
+                    (socket.SOL_SOCKET, socket.SO_RCVBUF, self._rcvBufSize) )
+        for level, option, value in options:
+            try:
+                self._sock.setsockopt(level, option, value)
+            except socket.error:
+                pass
 
-    def _splitQuery(self, scpiQuery):
-        """
-        Split the query using *opc? with no respect to how it is written
-        and deliver the parts. Both upper and lower case and whitespace are preserved.
+    def _readResponse(self, timeout):
+        """Return the next response including the terminating <LF>.
+
+        Data received behind the <LF> is kept for the next call.
+        On timeout the incomplete data received so far is returned (without <LF>).
+        The receive buffer is reused for all calls; the response is a bytearray copy.
         """
-        retval = []
-        nonOpcItems = ''
-        queryParts = scpiQuery.split(';')
-        for item in queryParts:
-            if item.upper().find('*OPC?') >= 0:
-                if nonOpcItems:
-                    retval.append(nonOpcItems)
-                    nonOpcItems = ''
-                retval.append(item)
-            else:
-                if nonOpcItems:
-                    nonOpcItems = ';'.join((nonOpcItems, item))
-                else:
-                    nonOpcItems = item
-        if nonOpcItems:
-            retval.append(nonOpcItems)
-        return retval
 
+        deadline = monotonic() + timeout
+        searchStart = 0
+        while True:
+            pos = self._rxBuffer.find(self._eoc_encoded, searchStart)
+            if pos >= 0:
+                pos += 1
+                response = self._rxBuffer[:pos]
+                del self._rxBuffer[:pos]
+                return response
+            searchStart = len(self._rxBuffer)
+            remaining = deadline - monotonic()
+            if remaining <= 0 or not select.select([self._sock], [], [], remaining)[0]:
+                response = self._rxBuffer[:]
+                del self._rxBuffer[:]
+                return response
+            received = self._sock.recv_into(self._rxChunk)
+            if not received:
+                raise OntRemoteError('Connection closed by remote unit')
+            self._rxBuffer += memoryview(self._rxChunk)[:received]
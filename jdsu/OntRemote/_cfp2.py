@@ -20,6 +20,8 @@ $Date: 2019-04-29 14:47:30 +0200 (Mo, 29 Apr 2019) $
 
 """
 
+import socket
+
 from ._base import _OntTcpConnection
 from ._error import OntRemoteError
 
@@ -32,35 +34,50 @@ class Cfp2:
           The SCPI mnemonics for the 'BMOD:SLOTn:PGRP:MODE' commands additionally have a '_MODE' postfix.
     """
 
+    _boardModeCatQuery = ':BMOD:SLOT%d:PGRP:MODE:CAT? PGRP1'
+    _boardModeQuery = ':BMOD:SLOT%d:PGRP:MODE? PGRP1'
+    _boardModeCmd = ':BMOD:SLOT%d:PGRP:MODE PGRP1,%s;*OPC?'
+
     def __init__(self, ipAddr, slotNo, ontRemote):
         self._ipAddr = ipAddr
         self._slotNo = int(slotNo)
         self._postfix = '_MODE'
         self._ontRemote = ontRemote
+        ## the module identity is invariant per connection; see numberOfPorts()
+        self._numberOfPorts = None
+        self._boardModes = None
+        ## administrative connection (port 5001) kept open for subsequent queries
+        self._admin = None
+
+    def _resetCache(self):
+        """Forget values cached for the current connection.
+        """
+
+        self._numberOfPorts = None
+        self._boardModes = None
 
     def availableBoardModes(self):
         """
         Return a list of the available board modes.
+
+        The list is queried once per connection.
         """
-        scpiQuery = ':BMOD:SLOT%d:PGRP:MODE:CAT? PGRP1' % (self._slotNo, )
-        result = self._processQuery(scpiQuery, 'availableBoardModes()', self._ontRemote.timeout)
-        boardModes = []
-        modeList = result.split(',')
-        # remove '_MODE'
-        for mode in modeList:
-            offset = mode.find(self._postfix)
-            boardModes.append(mode[:offset])
-        return boardModes
+        if self._boardModes is None:
+            scpiQuery = self._boardModeCatQuery % (self._slotNo, )
+            result = self._processQuery(scpiQuery, 'availableBoardModes()', self._ontRemote.timeout)
+            # remove '_MODE'
+            self._boardModes = result.replace(self._postfix, '').split(',')
+        ## a copy: the caller may modify the list
+        return list(self._boardModes)
 
     def getBoardMode(self):
         """
         Return the currently configured board mode.
         """
-        scpiQuery = ':BMOD:SLOT%d:PGRP:MODE? PGRP1' % (self._slotNo, )
+        scpiQuery = self._boardModeQuery % (self._slotNo, )
         result = self._processQuery(scpiQuery, 'getBoardMode():', self._ontRemote.timeout)
         # remove '_MODE'
-        offset = result.find(self._postfix)
-        return result[:offset]
+        return result.split(self._postfix, 1)[0]
 
     def setBoardMode(self, boardMode):
         """
@@ -72,7 +89,9 @@ class Cfp2:
         """
         # append '_MODE'
         boardMode += self._postfix
-        scpiQuery = ':BMOD:SLOT%d:PGRP:MODE PGRP1,%s;*OPC?' % (self._slotNo, boardMode)
+        scpiQuery = self._boardModeCmd % (self._slotNo, boardMode)
+        ## defensive: a board mode change might change the list of available modes
+        self._boardModes = None
         result = self._processQuery(scpiQuery, 'setBoardMode():', self._ontRemote.timeout)
 
     def numberOfPorts(self):
@@ -80,9 +99,14 @@ class Cfp2:
         Return the number of ports supported by this module.
 
         Note: When called for a module which is not a CFP2 module '0' is returned.
+        The result is queried once per connection.
         """
-        idnString = self._ontRemote.receiveScpi('*idn?')
-        moduleName = idnString.split(',')[1]
+        if self._numberOfPorts is not None:
+            return self._numberOfPorts
+        idnString = self._ontRemote._idn
+        if idnString is None:
+            idnString = self._ontRemote.receiveScpi('*idn?')
+        moduleName = idnString.split(',', 2)[1]
         modName = moduleName.upper()
         result = 0
         if 'CFP2' in modName:
@@ -92,32 +116,63 @@ class Cfp2:
                 result = 1
             else:
                 raise OntRemoteError('Unexpected CFP2 module type: %s' % (moduleName, ))
+        self._numberOfPorts = result
         return result
 
-    def _processQuery(self, scpiQuery, errorLabel = '', timeout = 30.0):
-        admin = _OntTcpConnection(self._ipAddr, 5001)
-        try:
-            admin.connect()
-        except:    # need specific exception here
-            raise OntRemoteError('%s: Unable to connect to administrative port 5001' % (self._ipAddr, ))
+    def _closeAdmin(self):
+        """Close the administrative connection if it is open.
+        """
+
+        admin = self._admin
+        self._admin = None
+        if admin is not None:
+            try:
+                admin.disconnect()
+            except socket.error:
+                pass
 
-        # For older SW version - just to be safe:
+    def _adminConnection(self):
+        """Return the administrative connection; (re)connect if it is not open.
+        """
+
+        if self._admin is not None and self._admin.isPeerClosed():
+            self._closeAdmin()
+        if self._admin is None:
+            admin = _OntTcpConnection(self._ipAddr, 5001)
+            try:
+                admin.connect()
+            except socket.error:
+                raise OntRemoteError('%s: Unable to connect to administrative port 5001' % (self._ipAddr, ))
+            # For older SW version - just to be safe:
+            try:
+                admin.promptOff()
+            except (OntRemoteError, socket.error):
+                admin.disconnect()
+                raise OntRemoteError('%s: Unable to communicate with administrative port 5001' % (self._ipAddr, ))
+            self._admin = admin
+        return self._admin
+
+    def _processQuery(self, scpiQuery, errorLabel = '', timeout = 30.0):
+        admin = self._adminConnection()
         try:
-            admin.sendScpi('*prompt off')
             data = admin.receiveScpi(scpiQuery, timeout)
-        except:    # need specific exception here
+        except (OntRemoteError, socket.error):
+            ## the connection state is unknown - use a new connection next time
+            self._closeAdmin()
             raise OntRemoteError('%s: Unable to communicate with administrative port 5001' % (self._ipAddr, ))
         else:
-            errlog = admin.receiveScpi(':SYST:ERR?', timeout)
-            errorCheckText = errlog.split(',')[1]
+            try:
+                errlog = admin.receiveScpi(':SYST:ERR?', timeout)
+            except:
+                self._closeAdmin()
+                raise
+            errorCheckText = errlog.split(',', 1)[1]
             errorCheckText = errorCheckText.lower()
-            if '"no error"' in errorCheckText:
+            if errorCheckText.startswith('"no error"'):
                 pass
             else:
                 # toDo: ONT errorlogger: with or without additional info from script?
                 # raise OntRemoteError('%s/slot %d: %s %s' % (self._ipAddr, self._slotNo, errorLabel, errlog))
                 raise OntRemoteError('%s' % (errlog, ))
-        finally:
-            admin.disconnect()
         return data
 
@@ -20,6 +20,7 @@ $Date: 2019-05-15 14:16:30 +0200 (Mi, 15 Mai 2019) $
 
 """
 
+import re
 from time import sleep
 
 from ._base import _OntTcpConnection
@@ -29,8 +30,13 @@ from ._application import Application
 from ._protection import Protection
 from ._cfp2 import Cfp2
 from ._vtm import VtmConfiguration
-from .util import parseVersionInfo
+from .util import parseVersionInfo, receiveScpiConcurrently
 
+## ':PRTM:LIST?' timeout per mainframe IP address, derived from the (invariant) number of slots
+_portListTimeouts = {}
+
+## a response item of a compound query: ';' inside a quoted string does not separate items
+_responseItemPattern = re.compile(r'(?:"[^"]*"|[^;"])+')
 
 class OntRemote:
     """Remote Control of an ONT measurement port."""
@@ -53,17 +59,36 @@ class OntRemote:
         self._ontPort = ontPort
         self._tcpPort = None
         self._ecEnabled = True
+        self._errorBatchSize = 8
         self._userName = ''
         self._pwdRequired = False
         self._versionInfo = None
+        ## module identification (*IDN?) read at connect
+        self._idn = None
         self._mp = _OntTcpConnection()
-        ## an initialized OntRemote object is needed here
-        self.cfp2 = Cfp2(ipAddress, self._parsePortString(ontPort)[1], self)
-        self.vtm  = VtmConfiguration(ipAddress, ontPort, self)
+        ## the port string is validated here; the module specific APIs are created on first use
+        self._slotNo = self._parsePortString(ontPort)[1]
+        self._cfp2 = None
+        self._vtm  = None
         ## memorize for reconnect - also update by protection
         self._user = None
         self._pwd  = None
 
+    @property
+    def cfp2(self):
+        """40/100G-CFP2 module specific functions"""
+        if self._cfp2 is None:
+            ## an initialized OntRemote object is needed here
+            self._cfp2 = Cfp2(self._ipAddr, self._slotNo, self)
+        return self._cfp2
+
+    @property
+    def vtm(self):
+        """VTM configuration functions"""
+        if self._vtm is None:
+            self._vtm = VtmConfiguration(self._ipAddr, self._ontPort, self)
+        return self._vtm
+
     def connect(self, user=None, password=None):
         """Establish a connection to an ONT measurement port.
 
@@ -104,8 +129,21 @@ class OntRemote:
                 finally:
                     raise OntRemoteError(ex)
             ## read SW version - used to control access to new APIs
-            versionInfo = self.receiveScpi(':DIAG:SW?')
+            ## the identification of the module is read within the same round trip
+            response = self.receiveScpi(':DIAG:SW?;*IDN?')
+            responseItems = _responseItemPattern.findall(response)
+            if len(responseItems) != 2:
+                try:
+                    self.disconnect()
+                except:
+                    pass
+                raise OntRemoteError('Connecting to %s, port %s failed - unexpected version/identification response: %s' % (self._ipAddr, self._ontPort, response))
+            versionInfo, self._idn = responseItems
             self._versionInfo = parseVersionInfo(versionInfo)
+            ## values cached for a previous connection may no longer be valid
+            self.application._resetCache()
+            if self._cfp2 is not None:
+                self._cfp2._resetCache()
 
     def disconnect(self):
         """Disconnect from the ONT measurement port.
@@ -113,6 +151,11 @@ class OntRemote:
         
         self._user = None
         self._pwd  = None
+        self._idn = None
+        if self._cfp2 is not None:
+            self._cfp2._closeAdmin()
+        if self._vtm is not None:
+            self._vtm._closeAdmin()
         self._disconnect()
 
     def sendScpi(self, command):
@@ -122,6 +165,9 @@ class OntRemote:
         also applies for the (internal) query of the error queue.
         """
         
+        if self._ecEnabled and not '?' in command:
+            self._sendChecked(command)
+            return
         errors = []
         try:
             self._send(command)
@@ -173,12 +219,30 @@ class OntRemote:
 
         return response
 
+    @staticmethod
+    def receiveScpiConcurrently(requests, timeout=None):
+        """Send SCPI queries to several ONT measurement ports at the same time and return the list of responses.
+
+        requests: A list of (ontRemote, query) tuples - each OntRemote instance may be used only once per call.
+        The responses are returned in the order of the requests; see util.receiveScpiConcurrently().
+        """
+
+        return receiveScpiConcurrently(requests, timeout)
+
     def setErrorCheck(self, errorCheck):
         """Enable/disable automatic error queue checks after sendScpi and receiveScpi calls.
         """
         
         self._ecEnabled = errorCheck
 
+    def setTcpNoDelay(self, enable):
+        """Enable/disable TCP_NODELAY for the measurement port connection.
+
+        It is enabled by default, so short SCPI messages are not delayed by Nagle's algorithm.
+        """
+
+        self._mp.setTcpNoDelay(enable)
+
     def getErrorsFromErrorQueue(self):
         """Read all pending error queue entries. 
         
@@ -186,13 +250,16 @@ class OntRemote:
         """
         
         entries = []
+        ## usually the queue is empty: start with a single entry; if errors are pending
+        ## read the following entries in batches - an empty queue reports "No error"
+        query = ':SYST:ERR?'
         while True:
-            errorCheck = self._receive(':SYST:ERR?')
-            errorCheckText = errorCheck.split(',')[1]
-            if errorCheckText == '"No error"':
-                break;
-            entries.append(errorCheck)
-        return entries
+            for errorCheck in _responseItemPattern.findall(self._receive(query)):
+                errorCheckText = errorCheck.split(',', 1)[1]
+                if errorCheckText == '"No error"':
+                    return entries
+                entries.append(errorCheck)
+            query = ';'.join([':SYST:ERR?'] * self._errorBatchSize)
 
     def getTimeout(self):
         """Return the current timeout value as integer [seconds].
@@ -228,6 +295,52 @@ class OntRemote:
         except Exception as ex:
             raise OntRemoteError('Sending data to %s, port %s failed: %s' % (self._ipAddr, self._ontPort, ex))
 
+    def _sendChecked(self, command):
+        """Send an SCPI command and check the error queue within the same round trip.
+
+        The error query is pipelined as separate command message: it is executed even if
+        the command fails. A command does not cause a response, so the single response
+        received is the first error queue entry.
+        """
+
+        errors = []
+        try:
+            errorCheck = self._receiveMessages([command, ':SYST:ERR?'])[0]
+        except OntRemoteError as ex:
+            errors = ex._hint
+            try:
+                self._scpiErrorCheck() # in case of error, raises OntRemoteError
+            except OntRemoteError as ex:
+                for msg in ex._hint:
+                    errors.append(msg)
+            except Exception as ex:
+                errors.append(ex)
+            raise OntRemoteError(errors)
+        if errorCheck.split(',', 1)[1] != '"No error"':
+            errors.append(errorCheck)
+            errors.extend(self.getErrorsFromErrorQueue())
+            raise OntRemoteError(errors)
+
+    def _receiveMessages(self, messages, timeout=None):
+        """Send a list of SCPI command messages at once and return the list of responses.
+
+        No ONT error logger check.
+        """
+
+        if timeout is None:
+            timeout = self.timeout
+        try:
+            responses = self._mp.receiveScpiMessages(messages, timeout)
+        except OntRemoteError as ex:
+            errors = []
+            for hint in ex._hint:
+                error = 'Receiving data from %s, port %s failed: %s' % (self._ipAddr, self._ontPort, hint)
+                errors.append(error)
+            raise OntRemoteError(errors)
+        except Exception as ex:
+            raise OntRemoteError('Receiving data from %s, port %s failed: %s' % (self._ipAddr, self._ontPort, ex))
+        return responses
+
     def _receive(self, query, timeout=None):
         """Send an SCPI query and wait for the response string.
 
@@ -263,7 +376,7 @@ class OntRemote:
 
         # For older SW version - just to be safe:
         try:
-            admin.sendScpi('*prompt off')
+            admin.promptOff()
             data = self._queryPortList(admin)
         except OntRemoteError:    # need specific exception here
             raise
@@ -276,24 +389,19 @@ class OntRemote:
         return (tcpPort, userName, pwdRequired)
 
     def _getTcpPort(self, ipAddr, ontPortString, prtmList):
-        portDescriptionList = prtmList.split(',')
-        searchString = ontPortString
-        for portDescription in portDescriptionList:
-            if portDescription.find(searchString) == 0:
-                ## limit number of items to 4, this enables future versions to add items to portDescription
-                portId, tcpPort, userName, protection = portDescription.split(':')[:4]
-                pwdRequired = False
-                if protection.find('protected') == 0:
-                    pwdRequired = True
-                return (int(tcpPort), userName, pwdRequired)
-
-        portsAvailable = []
-        for portDescription in portDescriptionList:
-            ## read required item only, this enables future versions to add items to portDescription
-            portId = portDescription.split(':')[0]
-            portsAvailable.append(portId)
-        availablePorts = ', '.join(portsAvailable)
-        raise OntRemoteError('%s: Requested measurement port not found: %s. Ports available: %s' % (ipAddr, ontPortString, availablePorts))
+        ## index the port descriptions by port ID in a single pass
+        ## limit number of items to 4, this enables future versions to add items to portDescription
+        portDescriptions = {}
+        for portDescription in prtmList.split(','):
+            items = portDescription.split(':', 4)
+            portDescriptions.setdefault(items[0], items)
+        items = portDescriptions.get(ontPortString)
+        if items is None or len(items) < 4:
+            availablePorts = ', '.join(portDescriptions)
+            raise OntRemoteError('%s: Requested measurement port not found: %s. Ports available: %s' % (ipAddr, ontPortString, availablePorts))
+        portId, tcpPort, userName, protection = items[:4]
+        pwdRequired = protection.startswith('protected')
+        return (int(tcpPort), userName, pwdRequired)
 
     def _checkProtection(self, userName, pwdRequired, user, password):
         if pwdRequired:
@@ -317,16 +425,20 @@ class OntRemote:
         return (mainframe, slot, port)
         
     def _queryPortList(self, tcpPort):
-        mainframeIDN = tcpPort.receiveScpi('*IDN?', self.timeout)[1:-1]
-        itemList = mainframeIDN.split(',')
-        numberOfSlots = itemList[1].split('-')[1]
-        timeout = 90.0      # 5.0 sec per slot + 30
-        try:
-            numberOfSlots = int(numberOfSlots)
-            timeout = max(60.0 + (numberOfSlots % 100) * 5.0, self.timeout) 
-        except ValueError:
-            pass
-        data = tcpPort.receiveScpi(':PRTM:LIST?', timeout)
+        ## the port list itself is always queried: TCP ports and protection may change at any time
+        timeout = _portListTimeouts.get(self._ipAddr)
+        if timeout is None:
+            mainframeIDN = tcpPort.receiveScpi('*IDN?', self.timeout)[1:-1]
+            itemList = mainframeIDN.split(',')
+            numberOfSlots = itemList[1].split('-')[1]
+            timeout = 90.0      # 5.0 sec per slot + 30
+            try:
+                numberOfSlots = int(numberOfSlots)
+                timeout = 60.0 + (numberOfSlots % 100) * 5.0
+            except ValueError:
+                pass
+            _portListTimeouts[self._ipAddr] = timeout
+        data = tcpPort.receiveScpi(':PRTM:LIST?', max(timeout, self.timeout))
         return data
     
     def _disconnect(self):
@@ -29,18 +29,32 @@ class Measurement:
     The measurement control API. It is used by the OntRemote instance and should not be used on its own.
     """
 
+    _runningBit = 16
+    _startCmd = ':INIT:IMM:ALL;*OPC?'
+    _sweTimeMaxCmd = ':SENS:SWE:TIME MAX;*OPC?'
+    _sweTimeCmd = ':SENS:SWE:TIME %d;*OPC?'
+    ## first SW version reporting the completion of ':ABOR' by '*WAI;*OPC?' (as also relied on by _restart);
+    ## older or unknown versions poll the operation status instead
+    _opcStopMinVersion = (0, 0, 0)
+
     def __init__(self, scpiConnection):
         self._con = scpiConnection
         self._sweTime = None
+        self._stopTimeout = 30.0
 
     def isRunning(self):
         """
         Return 'True' if the measurement is running.
         """
-        resStr = self._con.receiveScpi(':STAT:OPER:COND?')
-        status = int(resStr)
-        result = (status & 16) > 0
-        return result
+        return (self.operationCondition() & Measurement._runningBit) != 0
+
+    def operationCondition(self):
+        """
+        Return the operation status condition register (:STAT:OPER:COND?) as integer.
+
+        Use it to test several status bits with a single query, e.g. the 'running' bit 16.
+        """
+        return int(self._con.receiveScpi(':STAT:OPER:COND?'))
 
     def start(self, gatingTime=None):
         """
@@ -49,18 +63,28 @@ class Measurement:
         gatingTime: This argument is optional. If not specified the current gatingTime is applied.
                     If set to -1 a continuous measurement is started.
         """
-        startCmd = ':INIT:IMM:ALL;*OPC?'
         if gatingTime is None:
-            scpiCmd = startCmd
+            scpiCmd = Measurement._startCmd
         else:
-            scpiCmd = self._sweTimeScpi(gatingTime) + ';' + startCmd
+            scpiCmd = self._sweTimeScpi(gatingTime) + ';' + Measurement._startCmd
         resStr = self._con.receiveScpi(scpiCmd)
 
     def stop(self):
         """
         Stop a running measurement.
         """
-        self._con.sendScpi(':ABOR')
+        versionInfo = self._con._versionInfo
+        if (versionInfo is not None) and (versionInfo >= Measurement._opcStopMinVersion):
+            ## the instrument reports the completion of the abort, no polling required (see _restart)
+            self._con.receiveScpi(':ABOR;*WAI;*OPC?', self._stopTimeout)
+        else:
+            self._con.sendScpi(':ABOR')
+            self._waitForStop()
+
+    def _waitForStop(self):
+        """
+        Poll the operation status until the measurement is stopped.
+        """
         doWait = True
         maxWait = 60
         while doWait and maxWait > 0:
@@ -95,9 +119,9 @@ class Measurement:
         
     def _sweTimeScpi(self, gatingTime):
         if gatingTime == -1:
-            return ':SENS:SWE:TIME MAX;*OPC?'
+            return Measurement._sweTimeMaxCmd
         elif gatingTime > 0:
-            return ':SENS:SWE:TIME %d;*OPC?' % (gatingTime, )
+            return Measurement._sweTimeCmd % (gatingTime, )
         else:
             raise OntRemoteError('Invalid gatingTime: %d' % (gatingTime, ))
 
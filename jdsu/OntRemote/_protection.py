@@ -22,7 +22,7 @@ $Date: 2019-05-15 14:16:30 +0200 (Mi, 15 Mai 2019) $
 
 from time import sleep
 
-from ._base import _OntTcpConnection
+from ._base import _OntTcpConnection, monotonic
 from ._error import OntRemoteError
 
 class Protection:
@@ -33,6 +33,7 @@ class Protection:
     def __init__(self, scpiConnection):
         self._con = scpiConnection
         self._waitTime = 5.0
+        self._pollInterval = 0.1
 
     def activate(self, user, password):
         """Activate protection.
@@ -43,28 +44,43 @@ class Protection:
         
         if not user or not password:
             raise OntRemoteError("User and password are mandatory arguments - empty strings not permitted")
-        userCmd = ':PRT:USER "%s"' % (user,)
-        self._con.sendScpi(userCmd)
+        ## user and password are set with a single command message
+        cmd = ':PRT:USER "%s";:PRT:PSWD "%s"' % (user, password)
+        self._con.sendScpi(cmd)
         self._con._user = user
-        if password is not None:
-            pwdCmd = ':PRT:PSWD "%s"' % (password,)
-            self._con.sendScpi(pwdCmd)
-            self._login(user, password)
-            self._con._pwd = password
+        self._login(user, password)
+        self._con._pwd = password
 
     def clear(self):
         """Clear password and user protection.
         """
         
-        prot, username = self.status()
-        if prot:
-            ## This command causes an ONT error logger if pwd is already cleared.
-            self._con.sendScpi(':PRT:PSWD ""')
-        if username:
-            ## This command causes an ONT error logger if user name is already cleared.
-            self._con.sendScpi(':PRT:USER ""')
+        ## Clearing an already cleared pwd or user name causes an ONT error logger.
+        ## Both commands are sent unconditionally as separate command messages - all within a
+        ## single round trip: the error queue is read before the commands in order to separate
+        ## pending entries from the ones caused by the clear, which are read behind the status query.
+        ## The entries caused by the clear are reported only if the protection is still active.
+        preReads = self._con._errorBatchSize
+        postReads = 2
+        responses = self._con._receiveMessages([':SYST:ERR?'] * preReads +
+                                               [':PRT:PSWD ""', ':PRT:USER ""', ':PRT:PROT?'] +
+                                               [':SYST:ERR?'] * postReads)
+        pendingErrors = [errorCheck for errorCheck in responses[:preReads] if errorCheck.split(',', 1)[1] != '"No error"']
+        clearErrors = [errorCheck for errorCheck in responses[preReads + 1:] if errorCheck.split(',', 1)[1] != '"No error"']
+        if len(pendingErrors) == preReads:
+            ## the pending entries exceed the pre-reads: they cannot be separated from the clear entries
+            pendingErrors.extend(clearErrors)
+            pendingErrors.extend(self._con.getErrorsFromErrorQueue())
+            clearErrors = []
+        elif len(clearErrors) == postReads:
+            clearErrors.extend(self._con.getErrorsFromErrorQueue())
+        prot, username = self._parseStatus(responses[preReads])
+        if prot or username:
+            raise OntRemoteError('Clearing protection failed: %s' % ('\n'.join(pendingErrors + clearErrors) or responses[preReads], ))
         self._con._user = None
         self._con._pwd  = None
+        if pendingErrors and self._con._ecEnabled:
+            raise OntRemoteError('\n'.join(pendingErrors))
 
     def status(self):
         """Return a tuple with (protection status, user name).
@@ -73,8 +89,11 @@ class Protection:
         If no user name is defined, None is returned as user name.
         """
         
+        return self._parseStatus(self._con.receiveScpi(':PRT:PROT?'))
+
+    def _parseStatus(self, response):
         ## a comma is not permitted as part of the user name thus split is safe.
-        statusStr, userStr = self._con.receiveScpi(':PRT:PROT?').split(',')
+        statusStr, userStr = response.split(',')
         userStr = userStr[1:-1]
         if not userStr: userStr = None
         return (bool(int(statusStr)), userStr)
@@ -96,11 +115,20 @@ class Protection:
             self._con._ecEnabled = currentEcState
         # We cannot use *opc? in order to wait until user-registration is finished
         # because in case of wrong data, and therefore an unsuccessful login
-        # the device prohibits the usage of *opc?. The only chance is to sleep.
-        sleep(self._waitTime)
-        errorCheck = self._con._receive(':SYST:ERR?')
-        errorCheckText = errorCheck.split(',')[1]
-        if errorCheckText != '"No error"':
-            raise OntRemoteError("Login to %s, port %s failed: %s" % (self._con._ipAddr, self._con._ontPort, errorCheck,))
+        # the device prohibits the usage of *opc?. The only chance is to poll.
+        ## The wait ends as soon as the protection status reports the registered user;
+        ## an error logger entry fails the login - both are checked until the wait time elapsed.
+        deadline = monotonic() + self._waitTime
+        while True:
+            errorCheck = self._con._receive(':SYST:ERR?')
+            errorCheckText = errorCheck.split(',', 1)[1]
+            if errorCheckText != '"No error"':
+                raise OntRemoteError("Login to %s, port %s failed: %s" % (self._con._ipAddr, self._con._ontPort, errorCheck,))
+            if self._parseStatus(self._con._receive(':PRT:PROT?')) == (True, user):
+                return
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return
+            sleep(min(self._pollInterval, remaining))
 
 
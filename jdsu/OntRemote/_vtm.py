@@ -19,17 +19,24 @@ Copyright (c) 2015 - 2019, VIAVI Solutions Inc.
 $Date: 2019-05-15 16:01:38 +0200 (Mi, 15 Mai 2019) $
 
 """
+import socket
 import time
-import collections
 
-from ._base import _OntTcpConnection
+from ._base import _OntTcpConnection, _splitQuery, monotonic
 from ._error import OntRemoteError
+from .util import _orderedDict
 
 class VtmConfiguration:
     """The VTM configuration API. It is used by the OntRemote instance and should not be used on its own.
     """
 
     _minVersion = (37, 0, 2)
+    _noErrorReply = '0,"No error"'
+
+    ## availableConfigurations() results: (ipAddr, slotNo, portNo) -> (timestamp, vtmTypes)
+    ## shared by all instances; a value of 0 for the time-to-live disables the cache
+    _configurationsCache = {}
+    configurationsCacheTtl = 30.0
 
     def __init__(self, ipAddr, portNo, ontRemote):
         self._ipAddr = ipAddr
@@ -37,7 +44,9 @@ class VtmConfiguration:
         self._slotNo = int( self._portNo.split('/')[2] )
         self._ontRemote = ontRemote
         self.timeout = 60.0
+        ## administrative connection (port 5001) kept open for subsequent calls
         self._admin = None
+        self._loginCredentials = None
 
     def configurationStatus(self):
         """Return a list of all VTMs with VTM identifier, configuration, owner and availability.
@@ -48,21 +57,24 @@ class VtmConfiguration:
         availability:   True if this VTM is available for re-configuration.
         """
 
+        self._connect()
         try:
-            self._connect()
-            partitions = self._partitionStatus()
-            scpiQuery = ':BMOD:SLOT%d:VTM:CONF?' % (self._slotNo, )
-            result = self._admin.receiveScpi(scpiQuery, self.timeout)
-            self._checkErrorLog()
-        finally:
-            self._disconnect()
+            ## partition status and configuration are read within the same round trip
+            scpiQueries = (':BMOD:SLOT%d:VTM:PART:STAT?' % (self._slotNo, ), ':BMOD:SLOT%d:VTM:CONF?' % (self._slotNo, ))
+            (statusResult, statusErrorCheck), (result, errorCheck) = self._queryWithErrorLog(scpiQueries, self.timeout)
+            self._checkErrorText(statusErrorCheck)
+            self._checkErrorText(errorCheck)
+        except:
+            self._closeAdmin()
+            raise
+        partitions = self._parsePartitionStatus(statusResult)
 
         vtmList = result.split(',')
         statusList = []
         for item in vtmList:
-            id, vtmType = item.split(':')[:2]
-            status = (id, vtmType, partitions[id][0], partitions[id][1])
-            statusList.append(status)
+            id, vtmType = item.split(':', 2)[:2]
+            owner, available = partitions[id]
+            statusList.append((id, vtmType, owner, available))
         return statusList
 
     def availableConfigurations(self):
@@ -72,28 +84,32 @@ class VtmConfiguration:
         # The list of setable VTM sizes only depends on module capabilities,
         # loaded applications and port protections. Current VTM configuration isn't considered.
         # In other words, the command returns a list of possible VTM sizes accepting a re-configuration.
+        # As this changes rarely, the result is cached for configurationsCacheTtl seconds.
+        cacheKey = (self._ipAddr, self._slotNo, self._portNo)
+        cached = VtmConfiguration._configurationsCache.get(cacheKey)
+        if cached is not None and monotonic() - cached[0] < self.configurationsCacheTtl:
+            return list(cached[1])
         scpiQuery = ':BMOD:SLOT%d:VTM:CONF:CAT? %s' % (self._slotNo, self._portNo)
         result = self._processQuery(scpiQuery, 'availableConfigurations()', self.timeout)
-        vtmTypes = []
         vtmTypeList = result.split(',')
         if vtmTypeList and not vtmTypeList[0]: vtmTypeList = vtmTypeList[1:]
-        for item in vtmTypeList:
-            vtmType = item.split(':')[1]
-            vtmTypes.append(vtmType)
+        vtmTypes = [item.split(':', 2)[1] for item in vtmTypeList]
+        VtmConfiguration._configurationsCache[cacheKey] = (monotonic(), tuple(vtmTypes))
         return vtmTypes
 
     def getConfiguration(self):
         """Return the current VTM configuration.
         """
 
+        self._connect()
         try:
-            self._connect()
             scpiQuery = ':BMOD:SLOT%d:VTM:CONF? %s' % (self._slotNo, self._portNo)
-            result = self._admin.receiveScpi(scpiQuery, self.timeout)
-            self._checkErrorLog()
-            size = result.split(':')[1]
-        finally:
-            self._disconnect()
+            result, errorCheck = self._queryWithErrorLog((scpiQuery, ), self.timeout)[0]
+            self._checkErrorText(errorCheck)
+            size = result.split(':', 2)[1]
+        except:
+            self._closeAdmin()
+            raise
         return size
 
     def setConfiguration(self, vtmConfig):
@@ -109,81 +125,50 @@ class VtmConfiguration:
         try:
             scpiQuery = ':BMOD:SLOT%d:VTM:CONF %s:%s;*OPC?' % (self._slotNo, self._portNo, vtmConfig)
             result = self._processQuery(scpiQuery, 'setConfiguration():', self.timeout)
+            self._invalidateConfigurationsCache()
             time.sleep(0.5)
-        except:
-            raise
         finally:
+            ## the partitions are reorganized: the administrative connection is kept,
+            ## but the user is registered again with the next query requiring a login
+            self._loginCredentials = None
             ## connect again (-> user and password is handled internally)
             if wasConnected:
                 self._ontRemote._reconnect()
 
-    def _partitionStatus(self, doConnect = False):
-        """Return the status of all partitions.
-        """
-
-        try:
-            if doConnect: self._connect()
-            scpiQuery = ':BMOD:SLOT%d:VTM:PART:STAT?' % (self._slotNo, )
-            result = self._admin.receiveScpi(scpiQuery, self.timeout)
-            self._checkErrorLog()
-        finally:
-            if doConnect: self._disconnect()
-        partitions = collections.OrderedDict()
+    def _parsePartitionStatus(self, result):
+        partitions = _orderedDict()
         partitionList = result.split(',')
         for part in partitionList:
-            partId, username, usage = part.split(':')[:3]
+            partId, username, usage = part.split(':', 3)[:3]
             if username == '': username = None
             free = bool(usage.lower() == 'unused')
             partitions[partId] = (username, free)
         return partitions
 
     def _processQuery(self, scpiQuery, errorLabel = '', timeout = 30.0):
-        admin = _OntTcpConnection(self._ipAddr, 5001)
-        try:
-            admin.connect()
-        except:    # need specific exception here
-            raise OntRemoteError('%s: Unable to connect to administrative port 5001' % (self._ipAddr, ))
-
-        errorCheck = admin.receiveScpi(':SYST:ERR?')
-        errorCheckText = errorCheck.split(',')[1]
-        errorCheckText = errorCheckText.lower()
-        if '"no error"' not in errorCheckText:
-            raise OntRemoteError("Administration Port %s: %s" % (self._ontRemote._ipAddr, errorCheck,))
-
-        self._login(admin)
-        # For older SW version - just to be safe:
+        self._connect(login=True)
         try:
-            admin.sendScpi('*prompt off')
-            data = admin.receiveScpi(scpiQuery, timeout)
-        except:    # need specific exception here
+            data, errlog = self._queryWithErrorLog((scpiQuery, ), timeout)[0]
+        except (OntRemoteError, socket.error):
+            self._closeAdmin()
             raise OntRemoteError('%s: Unable to communicate with administrative port 5001' % (self._ipAddr, ))
         else:
-            errlog = admin.receiveScpi(':SYST:ERR?', timeout)
-            errorCheckText = errlog.split(',')[1]
-            errorCheckText = errorCheckText.lower()
-            if '"no error"' in errorCheckText:
+            if self._isNoError(errlog):
                 pass
             else:
                 # toDo: ONT errorlogger: with or without additional info from script?
                 # raise OntRemoteError('%s/slot %d: %s %s' % (self._ipAddr, self._slotNo, errorLabel, errlog))
                 raise OntRemoteError('%s' % (errlog, ))
-        finally:
-            admin.disconnect()
         return data
 
     def _login(self, admin):
         if self._ontRemote._pwd is not None:
             cmd = ':BMOD:SLOT%d:USER:REG "%s","%s"' % (self._slotNo, self._ontRemote._user, self._ontRemote._pwd)
-            try:
-                admin.sendScpi(cmd)
-            except:
-                raise
-            opcResult = int(admin.receiveScpi('*OPC?'))
+            ## registration, *OPC? and error log query within one round trip (separate command messages)
+            opcResponse, errorCheck = admin.receiveScpiMessages([cmd, '*OPC?', ':SYST:ERR?'])
+            opcResult = int(opcResponse)
             ## toDo: check OPC result
-            errorCheck = admin.receiveScpi(':SYST:ERR?')
-            errorCheckText = errorCheck.split(',')[1]
-            errorCheckText = errorCheckText.lower()
-            if '"no error"' not in errorCheckText:
+            if not self._isNoError(errorCheck):
                 raise OntRemoteError("Login to %s: %s" % (admin._ipAddr, errorCheck,))
 
 
@@ -197,26 +182,97 @@ class VtmConfiguration:
                 raise OntRemoteError('%s:%s: Version required: %s  version used: %s' % (self._ipAddr, self._portNo, reqVersion, actVersion))
 
 
-    def _connect(self):
-        self._admin = _OntTcpConnection(self._ipAddr, 5001)
-        try:
-            self._admin.connect()
-        except:    # need specific exception here
-            raise OntRemoteError('%s: Unable to connect to administrative port 5001' % (self._ipAddr, ))
+    def _connect(self, login=False):
+        """Return the administrative connection; open it if it is not open yet.
 
-        try:
-            self._checkErrorLog()
-            self._admin.sendScpi('*prompt off')
-        except:    # need specific exception here
-            raise OntRemoteError('%s: Unable to communicate with administrative port 5001' % (self._ipAddr, ))
+        The session bootstrap (error log check, *prompt off) is done once per connection,
+        the login once per user and password.
+        """
+
+        if self._admin is not None and self._admin.isPeerClosed():
+            self._closeAdmin()
+        if self._admin is None:
+            admin = _OntTcpConnection(self._ipAddr, 5001)
+            try:
+                admin.connect()
+            except socket.error:
+                raise OntRemoteError('%s: Unable to connect to administrative port 5001' % (self._ipAddr, ))
+            self._admin = admin
+            try:
+                self._checkErrorLog()
+            except:
+                self._closeAdmin()
+                raise
+            try:
+                self._admin.promptOff()
+            except (OntRemoteError, socket.error):
+                self._closeAdmin()
+                raise OntRemoteError('%s: Unable to communicate with administrative port 5001' % (self._ipAddr, ))
+        if login:
+            credentials = (self._ontRemote._user, self._ontRemote._pwd)
+            if credentials != self._loginCredentials:
+                self._login(self._admin)
+                self._loginCredentials = credentials
+        return self._admin
+
+    def _invalidateConfigurationsCache(self):
+        """Drop the cached availableConfigurations() results of all ports of the slot.
+
+        A re-configuration affects the VTMs of the neighbour ports too.
+        """
+
+        cache = VtmConfiguration._configurationsCache
+        for cacheKey in list(cache.keys()):
+            if cacheKey[:2] == (self._ipAddr, self._slotNo):
+                cache.pop(cacheKey, None)
+
+    def _closeAdmin(self):
+        """Close the administrative connection if it is open.
+        """
 
-    def _disconnect(self):
-        self._admin.disconnect()
+        admin = self._admin
         self._admin = None
+        self._loginCredentials = None
+        if admin is not None:
+            try:
+                admin.disconnect()
+            except socket.error:
+                pass
+
+    def _queryWithErrorLog(self, scpiQueries, timeout):
+        """Send the queries, each followed by an error log query, in a single pipelined write.
+
+        Returns a list of (response, errorCheck) tuples - one per query.
+        The error log query is sent as separate command message, it is executed even if the query fails.
+        """
+
+        messages = []
+        responseCounts = []
+        for scpiQuery in scpiQueries:
+            queryParts = _splitQuery(scpiQuery)
+            messages.extend(queryParts)
+            messages.append(':SYST:ERR?')
+            responseCounts.append(len([queryPart for queryPart in queryParts if '?' in queryPart]))
+        responses = self._admin.receiveScpiMessages(messages, timeout)
+        results = []
+        pos = 0
+        for count in responseCounts:
+            results.append((';'.join(responses[pos:pos+count]), responses[pos+count]))
+            pos += count + 1
+        return results
 
     def _checkErrorLog(self):
-        errorCheck = self._admin.receiveScpi(':SYST:ERR?')
-        errorCheckText = errorCheck.split(',')[1]
-        errorCheckText = errorCheckText.lower()
-        if '"no error"' not in errorCheckText:
+        self._checkErrorText(self._admin.receiveScpi(':SYST:ERR?'))
+
+    def _checkErrorText(self, errorCheck):
+        if not self._isNoError(errorCheck):
             raise OntRemoteError("Administration Port %s: %s" % (self._ontRemote._ipAddr, errorCheck,))
+
+    def _isNoError(self, errorCheck):
+        """Return True if the error log entry reports no error.
+        """
+
+        ## fast path: the exact standard reply; otherwise compare the text case-insensitively
+        if errorCheck == VtmConfiguration._noErrorReply:
+            return True
+        return errorCheck.split(',', 1)[1].lower().startswith('"no error"')
@@ -22,7 +22,20 @@ $Date: 2019-04-29 14:47:30 +0200 (Mo, 29 Apr 2019) $
 
 import collections
 import json
+import re
+import sys
+import threading
 
+from ._error import OntRemoteError
+
+
+## parsed version info tuples per version info string; the strings repeat for every (re)connect
+_versionInfoCache = {}
+_versionInfoCacheSize = 64
+_nonDigitPattern = re.compile(r'\D')
+
+## the plain dict keeps the insertion order since Python 3.7 and is cheaper than OrderedDict
+_orderedDict = dict if sys.version_info >= (3, 7) else collections.OrderedDict
 
 
 def parseVersionInfo(versionInfo):
@@ -31,14 +44,59 @@ def parseVersionInfo(versionInfo):
     The build number is experimentally included for fine-grained tests during development.
     """
 
-    if versionInfo[0] == '"':
-        versionInfo = versionInfo[1:-1]
-    version = versionInfo.split('-')[-2]
-    build = versionInfo.split('-')[-1]
+    try:
+        return _versionInfoCache[versionInfo]
+    except KeyError:
+        pass
+    versionString = versionInfo
+    if versionString[0] == '"':
+        versionString = versionString[1:-1]
+    ## only the last two '-' separated fields are needed
+    version, build = versionString.rsplit('-', 2)[-2:]
     ## this removes any non-digit characters at any position (possibly to forgiving)
-    buildNo = int( ''.join([ch for ch in build if ch.isdigit()]) )
-    major, minor, bugFix = version.split('.')[:3]
-    return (int(major), int(minor), int(bugFix), buildNo)
+    buildNo = int( _nonDigitPattern.sub('', build) )
+    major, minor, bugFix = version.split('.', 3)[:3]
+    result = (int(major), int(minor), int(bugFix), buildNo)
+    if len(_versionInfoCache) >= _versionInfoCacheSize:
+        _versionInfoCache.clear()
+    _versionInfoCache[versionInfo] = result
+    return result
+
+
+def receiveScpiConcurrently(requests, timeout=None):
+    """Send SCPI queries to several ONT measurement ports at the same time and return the list of responses.
+
+    requests: A list of (ontRemote, query) tuples. Each OntRemote instance may be used only once per call,
+              because a single connection processes its queries sequentially anyway.
+    timeout:  Optional timeout passed to each receiveScpi() call.
+
+    The responses are returned in the order of the requests. The network round trips of the
+    ports overlap, thus the call takes about as long as the slowest query.
+    If any query fails, the first exception (in request order) is raised after all queries finished.
+    """
+
+    ontRemotes = [ontRemote for ontRemote, query in requests]
+    if len(set(map(id, ontRemotes))) != len(ontRemotes):
+        raise OntRemoteError('receiveScpiConcurrently: An OntRemote instance is used more than once')
+    responses = [None] * len(requests)
+    exceptions = [None] * len(requests)
+
+    def worker(index, ontRemote, query):
+        try:
+            responses[index] = ontRemote.receiveScpi(query, timeout)
+        except Exception as ex:
+            exceptions[index] = ex
+
+    threads = [threading.Thread(target=worker, args=(index, ontRemote, query))
+               for index, (ontRemote, query) in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for ex in exceptions:
+        if ex is not None:
+            raise ex
+    return responses
 
 
 # string constants - json input tags
@@ -57,23 +115,35 @@ TAG_type  = 'type'
 TAG_eventID = 'eventID'
 TAG_additionalInfo = 'additionalInfo'
 
+## translation table of field types without enums; shared, never modified
+_noEnums = {}
+
 class OntEventDecoderError(Exception):
     """Base class for exceptions in this module."""
 
 
-class OntEventDecoder:
+class OntEventDecoder(object):
+    ## fixed attribute set: faster attribute access for the per event decoding, no per instance dict
+    __slots__ = ('_strict', '_formatDict', '_enumDict', '_fidShift', '_fidMask', '_decoderDict', '_tagDict',
+                 '_decoderList', '_tagList', '_fieldDecoderList')
+
     def __init__(self, evtFormatString, strict = False):
         self._strict = strict
         self._formatDict = json.loads(evtFormatString)
+        ## the enum dict is needed first: the tag dict refers to its translation tables
+        self._enumDict = {}
+        if TAG_ENUMS in self._formatDict:
+            self._enumDict = self._buildEnumDict()
         try:
             self._fidShift, self._fidMask = self._buildFormatIdDecoder()
             self._decoderDict, self._tagDict = self._buildDecoderDicts()
         except OntEventDecoderError as ex:
             ## unconditionally raise an exception because mandatory decoding information is broken
             raise ex
-        self._enumDict = {}
-        if TAG_ENUMS in self._formatDict:
-            self._enumDict = self._buildEnumDict()
+        ## format ids are small bitfield values: per event tables are indexed lists instead of dicts
+        self._decoderList = self._buildDenseTable(self._decoderDict)
+        self._tagList = self._buildDenseTable(self._tagDict)
+        self._fieldDecoderList = self._buildDenseTable(self._buildFieldDecoderDict())
         if self._strict:
             self._validate()
 
@@ -81,23 +151,35 @@ class OntEventDecoder:
         return bool(self._formatDict)
 
     def decodeEvent(self, value):
-        try:
-            fmtIndex, values = self._decode(value)
-        except OntEventDecoderError:
-            if self._strict: raise
+        ## the decoding is inlined: one call per event
+        formatIndex = (value >> self._fidShift) & self._fidMask
+        fieldDecoderList = self._fieldDecoderList
+        fieldDecoders = fieldDecoderList[formatIndex] if formatIndex < len(fieldDecoderList) else None
+        if fieldDecoders is None:
+            if self._strict: raise OntEventDecoderError('Unexpected format id: %d' % (formatIndex,))
             else: return {}
-        tags = self._tagDict[fmtIndex]
+        eventIdDecoders, addInfoDecoders = fieldDecoders
         result = {}
-        addInfoDict = collections.OrderedDict()
-        for tag, value in zip(tags, values):
-            if tag[0] == TAG_eventID:
-                result[tag[0]] = (value, self._interpretedValue(value, tag[1]))
-            else:
-                addInfoDict[tag[0]] = (value, self._interpretedValue(value, tag[1]))
-        if addInfoDict:
+        for name, shiftValue, mask, enumText in eventIdDecoders:
+            fieldValue = (value >> shiftValue) & mask
+            result[name] = (fieldValue, enumText(fieldValue, ''))
+        if addInfoDecoders:
+            addInfoDict = _orderedDict()
+            for name, shiftValue, mask, enumText in addInfoDecoders:
+                fieldValue = (value >> shiftValue) & mask
+                addInfoDict[name] = (fieldValue, enumText(fieldValue, ''))
             result[TAG_additionalInfo] = addInfoDict
         return result
 
+    def decodeEvents(self, values):
+        """Decode a sequence of event values.
+
+        Returns a list with one dictionary per value, as returned by decodeEvent().
+        """
+
+        decodeEvent = self.decodeEvent
+        return [decodeEvent(value) for value in values]
+
     def additionalInfo(self):
         """Return items defined as additional info.
         """
@@ -117,58 +199,44 @@ class OntEventDecoder:
         """Public API or specialized function that lists possible enum strings only?
         """
 
-        print("Format-ID Decoder:   Shift = %d    Mask = %X" % (self._fidShift, self._fidMask))
-        print("Format-ID    Name       Type     Shift     Mask")
+        ## the lines are collected and printed at once
+        lines = ["Format-ID Decoder:   Shift = %d    Mask = %X" % (self._fidShift, self._fidMask),
+                 "Format-ID    Name       Type     Shift     Mask"]
+        sectionFormat = '%6s   %10s  %6s        %3d   %6X'
         for format in self._formatDict[TAG_MFEVENTID][TAG_FORMATS]:
-            isFirst = True
-            fid = format[TAG_FORMATID_VALUE]
-            sections = format[TAG_FORMAT]
-            for section in sections:
-                text = '%6s' % ' '
-                if isFirst:
-                    text = '%6d' % fid
-                    isFirst = False
-                text += '   %10s  %6s        %3d   %6X' % (section[TAG_name], section[TAG_type], section[TAG_shift], section[TAG_mask])
-                print(text)
+            fidText = '%6d' % format[TAG_FORMATID_VALUE]
+            for section in format[TAG_FORMAT]:
+                lines.append(sectionFormat % (fidText, section[TAG_name], section[TAG_type], section[TAG_shift], section[TAG_mask]))
+                ## the format id is only shown in the first line of a format
+                fidText = ''
 
         if dumpEnums:
             for typeTag in sorted(self._enumDict.keys()):
                 transDict = self._enumDict[typeTag]
-                print("Type: %s" % (typeTag,))
-                for value in sorted(transDict.keys()):
-                    print("  %5d    %s" % (value, transDict[value]))
+                lines.append("Type: %s" % (typeTag,))
+                lines.extend(["  %5d    %s" % (value, transDict[value]) for value in sorted(transDict.keys())])
+        print('\n'.join(lines))
 
     def _decode(self, value):
         formatIndex = (value >> self._fidShift) & self._fidMask
-        try:
-            decoderList = self._decoderDict[formatIndex]
-        except KeyError as ex:
-            raise OntEventDecoderError('Unexpected format id: %d' % (ex.args[0],))
-        resultList = []
-        for shiftValue, mask in decoderList:
-            resultList.append((value >> shiftValue) & mask)
-        return formatIndex, resultList
+        decoderLists = self._decoderList
+        decoderList = decoderLists[formatIndex] if formatIndex < len(decoderLists) else None
+        if decoderList is None:
+            raise OntEventDecoderError('Unexpected format id: %d' % (formatIndex,))
+        return formatIndex, [(value >> shiftValue) & mask for shiftValue, mask in decoderList]
 
     def _decodeVerbose(self, value):
         """Obsolet function?
         """
 
         fmtIndex, values = self._decode(value)
-        tags = self._tagDict[fmtIndex]
+        tags = self._tagList[fmtIndex]
         results = []
         for tag, value in zip(tags, values):
-            results.append('%s: %d (%s)' % (tag[0], value, self._interpretedValue(value, tag[1])))
+            results.append('%s: %d (%s)' % (tag[0], value, tag[1](value, '')))
         results.append('(Format: %d)' % fmtIndex)
         return '  '.join(results)
 
-    def _interpretedValue(self, value, typeTag):
-        res = ''
-        try:
-            res = self._enumDict[typeTag][value]
-        except KeyError:
-            pass
-        return res
-
     def _buildFormatIdDecoder(self):
         """Returns (shift, mask) tuple needed for decoding the format ID."""
         try:
@@ -179,11 +247,12 @@ class OntEventDecoder:
         return fidShift, fidMask
 
     def _buildDecoderDicts(self):
-        """Returns a dict of (shiftValue, mask) pairs for decoding of event result.
+        """Returns a dict of (shiftValue, mask) pair tuples for decoding of event result.
 
         The first index is the format index.
         The second index is the bitfield index. The bitfield order is highest bits first (left to right).
-        The second dict returned provides (name, typeTag) tuples in the same order as the decode dict.
+        The second dict returned provides (name, enumText) tuples in the same order as the decode dict.
+        enumText is the get() method of the enum translation dict of the field type (empty for untranslated types).
         """
 
         formatDecoder = {}
@@ -198,22 +267,47 @@ class OntEventDecoder:
                 sections = format[TAG_FORMAT]
                 for section in sections:
                     bitfieldDecoder.append((section[TAG_shift], section[TAG_mask]))
-                    bitFieldTags.append((str(section[TAG_name]), str(section[TAG_type])))
-                formatDecoder[fid] = bitfieldDecoder
-                formatTags[fid] = bitFieldTags
+                    enums = self._enumDict.get(str(section[TAG_type]), _noEnums)
+                    bitFieldTags.append((str(section[TAG_name]), enums.get))
+                ## immutable tables: built once, iterated per decoded event
+                formatDecoder[fid] = tuple(bitfieldDecoder)
+                formatTags[fid] = tuple(bitFieldTags)
         except KeyError as ex:
             raise OntEventDecoderError('Field Decoder: Mandatory tag not found: %s' % (ex, ))
         return formatDecoder, formatTags
 
+    def _buildFieldDecoderDict(self):
+        """Returns a dict with two tuples of (name, shiftValue, mask, enumText) items per format index.
+
+        Combines the decoder, tag and enum dicts once, so decodeEvent() needs a single lookup per event.
+        The first tuple holds the eventID field(s), the second one the additional info fields; thus
+        decodeEvent() needs no name comparison per field.
+        enumText is taken from the tag dict.
+        """
+
+        fieldDecoderDict = {}
+        for fid, decoderList in self._decoderDict.items():
+            fieldDecoders = [ (tag[0], shiftValue, mask, tag[1])
+                              for (shiftValue, mask), tag in zip(decoderList, self._tagDict[fid]) ]
+            fieldDecoderDict[fid] = ( tuple(item for item in fieldDecoders if item[0] == TAG_eventID),
+                                      tuple(item for item in fieldDecoders if item[0] != TAG_eventID) )
+        return fieldDecoderDict
+
+    def _buildDenseTable(self, tableDict):
+        """Returns a list indexed by format id with the items of the format id keyed tableDict.
+
+        Unused format ids are None.
+        """
+
+        table = [None] * (max(tableDict) + 1 if tableDict else 0)
+        for fid, item in tableDict.items():
+            table[fid] = item
+        return table
+
     def _buildEnumDict(self):
-        enums = self._formatDict[TAG_ENUMS]
-        enumDict = {}
-        for typeTag in enums.keys():
-            decoder = {}
-            for text, value in enums[typeTag].items():
-                decoder[value] = str(text)
-            enumDict[str(typeTag)] = decoder
-        return enumDict
+        """Returns a dict of value -> text translation dicts per type tag."""
+        return {str(typeTag): {value: str(text) for text, value in items.items()}
+                for typeTag, items in self._formatDict[TAG_ENUMS].items()}
 
     def _validate(self):
         """